@@ -0,0 +1,46 @@
+import argparse
+import json
+import sys
+
+from .harness import SUITES, compare, run_case
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks",
+                                     description="Time the phases of solving generated mazes of increasing size.")
+    parser.add_argument("--suite", choices=sorted(SUITES), default="default", help="set of mazes")
+    parser.add_argument("--cases", nargs="*", help="run only the cases with these names")
+    parser.add_argument("--backend", default="highs", help="LP solver")
+    parser.add_argument("--repeat", type=int, default=3, help="report the minimum over this many runs")
+    parser.add_argument("--output", "-o", help="write the results as JSON to this file (default: stdout)")
+    parser.add_argument("--baseline", help="JSON results to compare with, exit with 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown relative to the baseline")
+    args = parser.parse_args()
+
+    results = []
+    for case in SUITES[args.suite]:
+        if args.cases and case.name not in args.cases:
+            continue
+        result = run_case(case, args.backend, args.repeat)
+        print(f"{case.name}: " + ", ".join(f"{phase} {elapsed:.4f}s" for phase, elapsed in result["phases"].items()),
+              file=sys.stderr)
+        results.append(result)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import random
+from collections import deque
+from typing import List, Optional, Tuple
+
+
+def generate_maze(width: int,
+                  height: int,
+                  obstacle_density: float = 0.2,
+                  num_golds: int = 1,
+                  num_dangers: int = 2,
+                  num_bandits: int = 1,
+                  hit_chance: float = 0.5,
+                  seed: Optional[int] = None,
+                  max_attempts: int = 1000) -> str:
+    # generate a random game specification in the format read by game_tree.read,
+    # the goal is always reachable from the start
+    assert 0 <= obstacle_density < 1
+    assert 0 < num_bandits <= num_dangers
+    assert 0 <= hit_chance <= 1
+    assert width * height >= num_golds + num_dangers + 2, "Maze is too small"
+
+    rng = random.Random(seed)
+    for _ in range(max_attempts):
+        grid = [["#" if rng.random() < obstacle_density else "-" for _ in range(width)] for _ in range(height)]
+        free = [(x, y) for y in range(height) for x in range(width) if grid[y][x] == "-"]
+        if len(free) < num_golds + num_dangers + 2:
+            continue
+
+        cells = rng.sample(free, num_golds + num_dangers + 2)
+        start, goal = cells[0], cells[1]
+        if not _reachable(grid, start, goal):
+            continue
+
+        for symbol, (x, y) in zip("SD" + "G" * num_golds + "E" * num_dangers, cells):
+            grid[y][x] = symbol
+
+        lines = [str(height), str(width)] + ["".join(row) for row in grid] + [str(num_bandits), str(hit_chance)]
+        return "\n".join(lines) + "\n"
+
+    raise ValueError("Failed to generate a maze with a reachable goal, decrease the obstacle density")
+
+
+def _reachable(grid: List[List[str]], start: Tuple[int, int], goal: Tuple[int, int]) -> bool:
+    height, width = len(grid), len(grid[0])
+    visited = {start}
+    queue = deque([start])
+    while queue:
+        x, y = queue.popleft()
+        if (x, y) == goal:
+            return True
+        for dx, dy in [(1, 0), (0, 1), (-1, 0), (0, -1)]:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < width and 0 <= ny < height and grid[ny][nx] != "#" and (nx, ny) not in visited:
+                visited.add((nx, ny))
+                queue.append((nx, ny))
+    return False
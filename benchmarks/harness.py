@@ -0,0 +1,140 @@
+import os
+import time
+from typing import Dict, List, NamedTuple, Optional
+
+from game import GameContext, History, HistoryType, SequenceForm, TranspositionTable, compile_tree
+from game.backends import Backend, get_backend
+from game_tree import read, write_gambit
+
+from .generator import generate_maze
+
+# measured phases in the order in which they are run
+PHASES = ("parse", "expand", "infoset_index", "compile", "export", "lp_assembly", "solve")
+
+# phases shorter than this are too noisy to be compared with a baseline
+NOISE_FLOOR = 0.005
+
+
+class Case(NamedTuple):
+    name: str
+    params: Dict  # keyword arguments of generate_maze
+
+
+# mazes of increasing size, so that the results form scaling curves
+SUITES: Dict[str, List[Case]] = {
+    "small": [
+        Case("4x4-d2-b1", dict(width=4, height=4, obstacle_density=0.2, num_golds=1, num_dangers=2, num_bandits=1,
+                               hit_chance=0.3, seed=0)),
+        Case("5x4-d3-b2", dict(width=5, height=4, obstacle_density=0.2, num_golds=1, num_dangers=3, num_bandits=2,
+                               hit_chance=0.3, seed=0)),
+    ],
+    "medium": [
+        Case("5x5-d3-b2", dict(width=5, height=5, obstacle_density=0.2, num_golds=1, num_dangers=3, num_bandits=2,
+                               hit_chance=0.3, seed=0)),
+        Case("5x5-d3-b1", dict(width=5, height=5, obstacle_density=0.2, num_golds=1, num_dangers=3, num_bandits=1,
+                               hit_chance=0.3, seed=0)),
+    ],
+    "large": [
+        Case("6x5-d4-b2", dict(width=6, height=5, obstacle_density=0.25, num_golds=2, num_dangers=4, num_bandits=2,
+                               hit_chance=0.3, seed=0)),
+    ],
+}
+SUITES["default"] = SUITES["small"] + SUITES["medium"]
+
+
+def run_case(case: Case, backend: str = "highs", repeat: int = 1) -> Dict:
+    # time every phase of a case, the minimum over the repetitions is reported
+    spec = generate_maze(**case.params)
+    solver = get_backend(backend)
+    best: Dict[str, float] = {phase: float("inf") for phase in PHASES}
+    counts: Dict[str, int] = {}
+
+    for _ in range(repeat):
+        for phase, elapsed in _run_phases(spec, solver, counts).items():
+            best[phase] = min(best[phase], elapsed)
+
+    return {"name": case.name, "params": case.params, "backend": backend, "counts": counts, "phases": best}
+
+
+def compare(results: List[Dict], baseline: List[Dict], tolerance: float = 0.25) -> List[str]:
+    # describe every phase which is slower than in the baseline by more than the tolerance
+    regressions = []
+    baseline_cases = {(r["name"], r["backend"]): r for r in baseline}
+    for result in results:
+        base = baseline_cases.get((result["name"], result["backend"]))
+        if base is None or base["params"] != result["params"]:
+            continue
+        for phase, elapsed in result["phases"].items():
+            base_elapsed = base["phases"].get(phase)
+            if base_elapsed is None or max(base_elapsed, elapsed) < NOISE_FLOOR:
+                continue
+            if elapsed > base_elapsed * (1 + tolerance):
+                regressions.append(f"{result['name']}: {phase} took {elapsed:.4f}s, "
+                                   f"baseline {base_elapsed:.4f}s ({elapsed / base_elapsed - 1:+.0%})")
+    return regressions
+
+
+class _Timer:
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+        self._phase: Optional[str] = None
+        self._start = 0.
+
+    def start(self, phase: str):
+        self._phase = phase
+        self._start = time.perf_counter()
+
+    def stop(self):
+        self.phases[self._phase] = time.perf_counter() - self._start
+
+
+def _run_phases(spec: str, backend: Backend, counts: Dict[str, int]) -> Dict[str, float]:
+    timer = _Timer()
+
+    timer.start("parse")
+    maze, num_bandits, hit_chance = read(iter(spec.splitlines()).__next__)
+    timer.stop()
+
+    # plain expansion of the histories, infosets of the decision histories are indexed separately
+    context = GameContext(maze, num_bandits, hit_chance)
+    timer.start("expand")
+    decisions: List[History] = []
+    stack = [History(context)]
+    num_nodes = 0
+    while stack:
+        history = stack.pop()
+        num_nodes += 1
+        if history.type() == HistoryType.terminal:
+            continue
+        if history.type() == HistoryType.decision:
+            decisions.append(history)
+        stack.extend([history.child(a) for a in history.actions()])
+    timer.stop()
+
+    timer.start("infoset_index")
+    for history in decisions:
+        history.infoset().index()
+    timer.stop()
+
+    timer.start("compile")
+    tree = compile_tree(History(GameContext(maze, num_bandits, hit_chance)), TranspositionTable())
+    timer.stop()
+
+    with open(os.devnull, "w") as devnull:
+        timer.start("export")
+        write_gambit(tree, devnull)
+        timer.stop()
+
+    timer.start("lp_assembly")
+    sequence_form = SequenceForm(tree)
+    lp = sequence_form.lp(0)
+    backend.standard_form(*lp)
+    timer.stop()
+
+    timer.start("solve")
+    backend.solve(*lp)
+    timer.stop()
+
+    counts.update(nodes=num_nodes, infosets=len(context.infosets.keys()),
+                  sequences=sum(s.num_sequences for s in sequence_form.sequences))
+    return timer.phases
@@ -1,6 +1,23 @@
-from .history import History
-from .infoset import Infoset
 from .enums import Player, HistoryType
-from .maze import Maze, Cell
 from .location import Location
+from .maze import Maze, Cell
 from .actions import Action, Move, Allocation, Chance
+from .infoset import Infoset, InfosetRegistry
+from .context import GameContext
+from .transposition import TranspositionTable
+from .history import History
+from .traversal import PathState, Visitor, traverse
+from .tree import CompiledTree, compile_tree
+from .sequence_form import Sequences, SequenceForm
+from .exploitability import BestResponse, Evaluation, best_response, evaluate
+from .cfr import CFRPlus, CFRResult
+from .presolve import Presolve
+from .double_oracle import Bounds, DoubleOracle, DoubleOracleResult
+from .parallel import compile_tree_parallel
+from .batched import BatchedExpansion, compile_tree_batched
+from .cache import GameCache
+from .efg import read_efg
+from .stats import Stats
+from .compile import compile_game, compile_sequence_form
+from .sweep import HitChanceSweep
+from .lazy import LazyTree, NodeId
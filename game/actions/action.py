@@ -2,6 +2,9 @@ import abc
 
 
 class Action(abc.ABC):
+    # actions are interned: equal actions are the same object, see the subclasses
+    __slots__ = ()
+
     value: int
 
     @abc.abstractmethod
@@ -1,38 +1,43 @@
 import itertools
-from typing import Tuple, List
-
-from game.location import Location
+from typing import Dict, Tuple, List
 
 from . import Action
 
 
 class Allocation(Action):
-    indexes: Tuple[int]
+    __slots__ = ("indexes",)
+
+    indexes: Tuple[int, ...]
+
+    # one allocation per tuple of indexes
+    _instances: Dict[Tuple[int, ...], 'Allocation'] = {}
 
-    def __init__(self, indexes: Tuple[int]):
-        self.indexes = indexes
+    def __new__(cls, indexes: Tuple[int, ...]) -> 'Allocation':
+        allocation = cls._instances.get(indexes)
+        if allocation is None:
+            allocation = cls._instances[indexes] = super().__new__(cls)
+            allocation.indexes = indexes
+        return allocation
+
+    def __reduce__(self):
+        return Allocation, (self.indexes,)
 
     def __str__(self):
         return f"Allocate({','.join(map(str, self.indexes))})"
 
     @staticmethod
     def possible(num_bandits: int,
-                 dangers: List[Location],
-                 bandits: List[Location],
-                 agent: Location
+                 num_dangers: int,
+                 current_indexes: Tuple[int, ...],
+                 agent_index: int
                  ) -> List['Allocation']:
-        indexes: List[int] = list(range(len(dangers)))
-        if not bandits:
+        # current_indexes are the indexes of dangers occupied by bandits, empty before the initial allocation.
+        # agent_index is the index of a danger occupied by the agent, -1 if there's no such danger.
+        # see GameContext.possible_allocations for the memoized version.
+        indexes: List[int] = list(range(num_dangers))
+        if not current_indexes:
             return list(map(Allocation, itertools.combinations(indexes, num_bandits)))
         else:
-            # determine the index of agent
-            agent_index = -1
-            if agent in dangers:
-                agent_index = dangers.index(agent)
-
-            # determine current indexes of bandits
-            current_indexes = tuple([dangers.index(bandit) for bandit in bandits])
-
             # add possible permutations
             possible = []
             for candidate_indexes in itertools.combinations(indexes, num_bandits):
@@ -1,17 +1,29 @@
-from typing import List
+from typing import Dict, List
 
 from . import Action
 
 
 class Chance(Action):
+    __slots__ = ("value",)
+
     HIT = 0
     MISS = 1
 
     value: int
 
-    def __init__(self, v: int):
-        assert v in (Chance.MISS, Chance.HIT)
-        self.value = v
+    # hit and miss
+    _instances: Dict[int, 'Chance'] = {}
+
+    def __new__(cls, v: int) -> 'Chance':
+        chance = cls._instances.get(v)
+        if chance is None:
+            assert v in (Chance.MISS, Chance.HIT)
+            chance = cls._instances[v] = super().__new__(cls)
+            chance.value = v
+        return chance
+
+    def __reduce__(self):
+        return Chance, (self.value,)
 
     def __str__(self) -> str:
         if self.value == Chance.MISS:
@@ -1,19 +1,31 @@
-from typing import List
+from typing import Dict, List, Tuple
 
-from game.location import Location
 from game.maze import Maze
 
 from . import Action
 
 
 class Move(Action):
+    __slots__ = ("dx", "dy")
+
     dx: int
     dy: int
 
-    def __init__(self, dx: int, dy: int):
-        assert abs(dx) + abs(dy) == 1
-        self.dx = dx
-        self.dy = dy
+    # the four possible moves
+    _instances: Dict[Tuple[int, int], 'Move'] = {}
+
+    def __new__(cls, dx: int, dy: int) -> 'Move':
+        move = cls._instances.get((dx, dy))
+        if move is None:
+            assert abs(dx) + abs(dy) == 1
+            move = cls._instances[dx, dy] = super().__new__(cls)
+            move.dx = dx
+            move.dy = dy
+        return move
+
+    def __reduce__(self):
+        # unpickled moves are interned as well
+        return Move, (self.dx, self.dy)
 
     def __str__(self) -> str:
         if self.dx == 1:
@@ -26,6 +38,6 @@ class Move(Action):
             return "Up"
 
     @staticmethod
-    def possible(maze: Maze, location: Location, visited: List[Location]) -> List['Move']:
-        neighbors = maze.neighbors(location)
-        return [Move(*n.sub(location)) for n in neighbors if n not in visited]
+    def possible(maze: Maze, cell: int, visited: int) -> List['Move']:
+        # visited is a bitmask of maze cells
+        return [Move(dx, dy) for n, dx, dy in maze.moves(cell) if not visited >> n & 1]
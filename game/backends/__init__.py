@@ -0,0 +1,15 @@
+from .backend import Backend, Model, Solution
+
+# backends are imported lazily, so that only the selected solver has to be installed
+BACKENDS = ("gurobi", "highs")
+
+
+def get_backend(name: str, **kwargs) -> Backend:
+    if name == "gurobi":
+        from .gurobi import GurobiBackend
+        return GurobiBackend(**kwargs)
+    elif name == "highs":
+        from .highs import HighsBackend
+        return HighsBackend(**kwargs)
+    else:
+        raise ValueError(f"Unknown LP backend: {name}")
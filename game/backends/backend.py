@@ -0,0 +1,86 @@
+import abc
+from typing import NamedTuple, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+
+
+class Solution(NamedTuple):
+    value: float           # expected utility in the root for the player
+    realization: np.ndarray  # player's realization plan, one value per sequence
+    values: np.ndarray     # values of opponent's infosets
+
+
+class Backend(abc.ABC):
+    # LP solver of the sequence-form LP of a player:
+    #
+    #   max f^T v
+    #   s.t. E r = e
+    #        F^T v - A^T r <= 0
+    #        0 <= r <= 1
+    #
+    # see SequenceForm.lp for the meaning of the matrices.
+
+    name: str
+
+    def fork(self) -> 'Backend':
+        # backend which can be used by another thread at the same time
+        return self
+
+    def model(self,
+              E: sp.csr_matrix, e: np.ndarray,
+              F: sp.csr_matrix, f: np.ndarray,
+              A: sp.csr_matrix) -> 'Model':
+        # LP which can be re-solved after a change of the payoff matrix
+        return Model(self, E, e, F, f, A)
+
+    @abc.abstractmethod
+    def solve(self,
+              E: sp.csr_matrix, e: np.ndarray,
+              F: sp.csr_matrix, f: np.ndarray,
+              A: sp.csr_matrix) -> Solution:
+        pass
+
+    @staticmethod
+    def standard_form(E: sp.csr_matrix, e: np.ndarray,
+                      F: sp.csr_matrix, f: np.ndarray,
+                      A: sp.csr_matrix
+                      ) -> Tuple[np.ndarray, sp.csr_matrix, np.ndarray, sp.csr_matrix, np.ndarray,
+                                 np.ndarray, np.ndarray]:
+        # the same LP over stacked variables x = [r, v]:
+        # max c^T x s.t. A_eq x = b_eq, A_ub x <= b_ub, lb <= x <= ub
+        num_r, num_v = E.shape[1], F.shape[0]
+
+        c = np.concatenate([np.zeros(num_r), f])
+        A_eq = sp.hstack([E, sp.csr_matrix((E.shape[0], num_v))]).tocsr()
+        A_ub = sp.hstack([-A.T, F.T]).tocsr()
+        b_ub = np.zeros(F.shape[1])
+        lb = np.concatenate([np.zeros(num_r), np.full(num_v, -np.inf)])
+        ub = np.concatenate([np.ones(num_r), np.full(num_v, np.inf)])
+        return c, A_eq, e, A_ub, b_ub, lb, ub
+
+
+class Model:
+    # sequence-form LP of a player, which can be re-solved after its payoff matrix changes.
+    # this one solves the whole LP again, backends supporting it update their models in place.
+
+    backend: Backend
+    E: sp.csr_matrix
+    e: np.ndarray
+    F: sp.csr_matrix
+    f: np.ndarray
+    A: sp.csr_matrix
+
+    def __init__(self,
+                 backend: Backend,
+                 E: sp.csr_matrix, e: np.ndarray,
+                 F: sp.csr_matrix, f: np.ndarray,
+                 A: sp.csr_matrix):
+        self.backend = backend
+        self.E, self.e, self.F, self.f, self.A = E, e, F, f, A
+
+    def set_payoff(self, A: sp.csr_matrix):
+        self.A = A
+
+    def solve(self) -> Solution:
+        return self.backend.solve(self.E, self.e, self.F, self.f, self.A)
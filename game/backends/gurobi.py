@@ -0,0 +1,97 @@
+from typing import Optional
+
+import gurobipy as gp
+import numpy as np
+import scipy.sparse as sp
+
+from game import stats
+from .backend import Backend, Model, Solution
+
+
+class GurobiBackend(Backend):
+    name = "gurobi"
+
+    env: Optional[gp.Env]
+    quiet: bool
+
+    def __init__(self, env: Optional[gp.Env] = None, quiet: bool = False):
+        if env is None and quiet:
+            # one environment without the solver log, reused by all models of the backend
+            env = gp.Env(empty=True)
+            env.setParam("OutputFlag", 0)
+            env.start()
+        self.env = env
+        self.quiet = quiet
+
+    def fork(self) -> 'GurobiBackend':
+        # environments can't be shared by threads
+        return GurobiBackend(quiet=True) if self.quiet else GurobiBackend(gp.Env())
+
+    def model(self,
+              E: sp.csr_matrix, e: np.ndarray,
+              F: sp.csr_matrix, f: np.ndarray,
+              A: sp.csr_matrix) -> 'GurobiModel':
+        return GurobiModel(self, E, e, F, f, A)
+
+    def solve(self,
+              E: sp.csr_matrix, e: np.ndarray,
+              F: sp.csr_matrix, f: np.ndarray,
+              A: sp.csr_matrix) -> Solution:
+        return self.model(E, e, F, f, A).solve()
+
+
+class GurobiModel(Model):
+    # the LP is built once, changes of the payoff matrix only update the changed coefficients,
+    # so that the next solve is warm-started from the basis of the previous one
+
+    backend: GurobiBackend
+
+    gp_model: gp.Model
+    x: gp.MVar             # stacked variables [r, v]
+    v_constrs: gp.MConstr  # v-constraints, one per opponent's sequence
+    num_r: int
+
+    def __init__(self,
+                 backend: GurobiBackend,
+                 E: sp.csr_matrix, e: np.ndarray,
+                 F: sp.csr_matrix, f: np.ndarray,
+                 A: sp.csr_matrix):
+        A = sp.csr_matrix(A, copy=True)
+        A.sort_indices()
+        super().__init__(backend, E, e, F, f, A)
+
+        with stats.phase("lp_build"):
+            c, A_eq, b_eq, A_ub, b_ub, lb, ub = backend.standard_form(E, e, F, f, A)
+            self.num_r = E.shape[1]
+
+            self.gp_model = gp.Model(env=backend.env)
+            self.x = self.gp_model.addMVar(len(c), lb=lb, ub=ub, vtype=gp.GRB.CONTINUOUS)
+            # r-constraints, one per player's infoset
+            self.gp_model.addMConstr(A_eq, self.x, "=", b_eq)
+            # v-constraints, one per opponent's sequence
+            self.v_constrs = self.gp_model.addMConstr(A_ub, self.x, "<", b_ub)
+            self.gp_model.setMObjective(None, c, 0., sense=gp.GRB.MAXIMIZE)
+            self.gp_model.update()
+
+    def set_payoff(self, A: sp.csr_matrix):
+        A = sp.csr_matrix(A, copy=True)
+        A.sort_indices()
+        assert np.array_equal(A.indptr, self.A.indptr) and np.array_equal(A.indices, self.A.indices), \
+            "Structure of the payoff matrix must not change"
+
+        with stats.phase("lp_update"):
+            changed = np.flatnonzero(A.data != self.A.data)
+            rows = np.repeat(np.arange(A.shape[0]), np.diff(A.indptr))[changed]
+            variables = self.x.tolist()
+            constrs = self.v_constrs.tolist()
+            # A^T r appears with a negative sign in the v-constraints
+            for i, j, value in zip(rows.tolist(), A.indices[changed].tolist(), A.data[changed].tolist()):
+                self.gp_model.chgCoeff(constrs[j], variables[i], -value)
+            stats.count("lp_updated_coefficients", len(changed))
+        self.A = A
+
+    def solve(self) -> Solution:
+        with stats.phase("lp_optimize"):
+            self.gp_model.optimize()
+        solution = self.x.X
+        return Solution(self.gp_model.objVal, solution[:self.num_r], solution[self.num_r:])
@@ -0,0 +1,26 @@
+import numpy as np
+import scipy.sparse as sp
+from scipy.optimize import linprog
+
+from game import stats
+from .backend import Backend, Solution
+
+
+class HighsBackend(Backend):
+    # license-free backend using the HiGHS solver shipped with SciPy
+    name = "highs"
+
+    def solve(self,
+              E: sp.csr_matrix, e: np.ndarray,
+              F: sp.csr_matrix, f: np.ndarray,
+              A: sp.csr_matrix) -> Solution:
+        with stats.phase("lp_build"):
+            c, A_eq, b_eq, A_ub, b_ub, lb, ub = self.standard_form(E, e, F, f, A)
+            num_r = E.shape[1]
+
+        with stats.phase("lp_optimize"):
+            result = linprog(-c, A_ub=A_ub, b_ub=b_ub, A_eq=A_eq, b_eq=b_eq,
+                             bounds=np.column_stack([lb, ub]), method="highs")
+        if result.status != 0:
+            raise RuntimeError(f"HiGHS failed to solve the LP: {result.message}")
+        return Solution(-result.fun, result.x[:num_r], result.x[num_r:])
@@ -0,0 +1,315 @@
+import itertools
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from game.actions import Allocation, Chance, Move
+from game.enums import HistoryType, Player
+from game.history import History, UTILITY
+from game.infoset import ALLOCATION_SYMBOL, CHANCE_SYMBOL, MOVE_SYMBOLS, NUM_SYMBOLS
+from game.tree import CompiledTree
+
+# the four moves in the order of Maze.moves
+_MOVES = [(1, 0), (0, 1), (-1, 0), (0, -1)]
+
+
+class _Layer:
+    # states of the nodes of a single depth, one entry per node.
+    # allocations are indexes of the combinations of dangers, -1 before the initial allocation.
+
+    player: np.ndarray        # Player
+    cell: np.ndarray          # agent's cell
+    visited: np.ndarray       # bitmask of visited cells packed into uint64 words, one row per node
+    allocation: np.ndarray    # allocation of the bandits
+    alarm: np.ndarray         # alarm flag
+    num_golds: np.ndarray     # gold count
+    agent_danger: np.ndarray  # index of the danger which triggered the alarm, -1 if none
+    agent_code: np.ndarray    # code of the agent's sequence of symbols, see InfosetRegistry
+
+    def __init__(self, **arrays: np.ndarray):
+        for name, array in arrays.items():
+            setattr(self, name, array)
+
+    def take(self, rows: np.ndarray) -> Dict[str, np.ndarray]:
+        return {name: array[rows] for name, array in vars(self).items()}
+
+
+class _Children:
+    # children of the nodes of a layer before they are sorted by their parents and actions
+    parent: List[np.ndarray]
+    action: List[np.ndarray]
+    label: List[np.ndarray]
+    symbol: List[np.ndarray]
+    chance_prob: List[np.ndarray]
+    states: List[Dict[str, np.ndarray]]
+
+    def __init__(self):
+        self.parent, self.action, self.label, self.symbol, self.chance_prob, self.states = [], [], [], [], [], []
+
+    def add(self, parent: np.ndarray, action: np.ndarray, label: np.ndarray, symbol: np.ndarray,
+            chance_prob: np.ndarray, state: Dict[str, np.ndarray]):
+        self.parent.append(parent)
+        self.action.append(action)
+        self.label.append(label)
+        self.symbol.append(symbol)
+        self.chance_prob.append(chance_prob)
+        self.states.append(state)
+
+
+class BatchedExpansion:
+    # level-synchronous expansion of the whole game tree.
+    #
+    # instead of creating a History per node, every depth is a layer of arrays of the game states
+    # and the next layer is computed by a few vectorized operations per player: moves are looked
+    # up in a table of the maze's neighbors, allocations in a table of the possible allocations for the
+    # distinct pairs of (allocation, agent's danger) of the layer. the nodes of a layer are ordered
+    # by their parents and actions, which is the breadth-first order of CompiledTree, and
+    # infosets and labels are indexed in the depth-first order of compile_tree afterwards,
+    # so the result is the same as compiled from the histories.
+    #
+    # NOTE: infosets are not registered in the GameContext of the root.
+
+    root: History
+
+    # labels of the root, the moves, the chance actions and the allocations, in this order
+    _labels: List[str]
+
+    # combinations of dangers occupied by the bandits and their indexes
+    _combinations: List[Tuple[int, ...]]
+    _allocation_index: Dict[Tuple[int, ...], int]
+
+    # neighbor of every cell in the direction of every move, -1 if there's none
+    _neighbor: np.ndarray
+    # word and bit of every cell in the packed visited bitmasks
+    _word: np.ndarray
+    _bit: np.ndarray
+    # per cell: gold, index of the danger or -1, and per allocation and danger: occupied by a bandit
+    _gold: np.ndarray
+    _danger: np.ndarray
+    _occupied: np.ndarray
+
+    def __init__(self, root: History):
+        assert root.type() == HistoryType.decision and not root.history, "Root of the game is expected"
+        self.root = root
+        maze = root.maze
+        num_cells = maze.width * maze.height
+        num_dangers = len(maze.dangers)
+
+        self._combinations = list(itertools.combinations(range(num_dangers), root.num_bandits))
+        self._allocation_index = {c: i for i, c in enumerate(self._combinations)}
+        self._labels = ([""] + [str(Move(dx, dy)) for dx, dy in _MOVES] + [str(Chance(Chance.MISS)),
+                        str(Chance(Chance.HIT))] + [str(Allocation(c)) for c in self._combinations])
+
+        self._neighbor = np.full((num_cells, len(_MOVES)), -1, dtype=np.int64)
+        for cell in range(num_cells):
+            for n, dx, dy in maze.moves(cell):
+                self._neighbor[cell, _MOVES.index((dx, dy))] = n
+        cells = np.arange(num_cells)
+        self._word = cells >> 6
+        self._bit = (cells & 63).astype(np.uint64)
+        self._gold = np.array([bool(maze.gold_mask >> cell & 1) for cell in cells])
+        self._danger = np.array([maze.danger_indexes.get(cell, -1) for cell in cells], dtype=np.int64)
+        self._occupied = np.zeros((len(self._combinations), num_dangers + 1), dtype=bool)
+        for i, combination in enumerate(self._combinations):
+            self._occupied[i, list(combination)] = True
+
+    def compile(self) -> CompiledTree:
+        root, maze = self.root, self.root.maze
+        visited = np.zeros((1, (maze.width * maze.height + 63) >> 6), dtype=np.uint64)
+        start = maze.index(maze.start)
+        visited[0, start >> 6] = np.uint64(1) << np.uint64(start & 63)
+        layer = _Layer(player=np.array([root.player], dtype=np.int8), cell=np.array([start]), visited=visited,
+                       allocation=np.array([-1]), alarm=np.array([True]), num_golds=np.array([0]),
+                       agent_danger=np.array([-1]), agent_code=np.array([0]))
+
+        columns: Dict[str, List[np.ndarray]] = {name: [] for name in
+                                                ("player", "parent", "action", "chance_prob", "label", "key",
+                                                 "utility")}
+        parent, action, chance_prob, label = np.array([-1]), np.array([-1]), np.array([1.]), np.array([0])
+        next_code = 1
+        offset = 0
+        while True:
+            columns["player"].append(layer.player)
+            columns["parent"].append(parent)
+            columns["action"].append(action)
+            columns["chance_prob"].append(chance_prob)
+            columns["label"].append(label)
+            columns["key"].append(self._keys(layer))
+            columns["utility"].append(np.where((layer.player == Player.terminal) & (layer.cell == maze.goal_index),
+                                               UTILITY + layer.num_golds, 0.))
+            size = len(layer.player)
+            layer, parent, action, chance_prob, label, next_code = self._expand(layer, next_code)
+            if not len(parent):
+                break
+            parent += offset
+            offset += size
+
+        player = np.concatenate(columns["player"])
+        parent = np.concatenate(columns["parent"])
+        node_type = np.full(len(player), HistoryType.decision, dtype=np.int8)
+        node_type[player == Player.chance] = HistoryType.chance
+        node_type[player == Player.terminal] = HistoryType.terminal
+
+        preorder = self._preorder(parent, [len(p) for p in columns["player"]])
+        key = np.concatenate(columns["key"])
+        decision = node_type == HistoryType.decision
+        infoset = np.full(len(player), -1, dtype=np.int32)
+        infoset[decision] = self._first_seen(key[decision], preorder[decision]) + 1
+        label = np.concatenate(columns["label"])
+        label_order = np.unique(label[np.argsort(preorder)], return_index=True)
+        labels = np.array(self._labels)[label_order[0][np.argsort(label_order[1])]].tolist()
+
+        return CompiledTree(
+            node_type=node_type,
+            parent=parent.astype(np.int32),
+            player=player,
+            infoset=infoset,
+            action=np.concatenate(columns["action"]).astype(np.int32),
+            chance_prob=np.concatenate(columns["chance_prob"]),
+            utility=np.concatenate(columns["utility"]).astype(np.float64),
+            label=self._first_seen(label, preorder).astype(np.int32),
+            labels=labels,
+        )
+
+    def _keys(self, layer: _Layer) -> np.ndarray:
+        # infoset keys of the decision nodes as integers, agent's keys are even and bandit's odd
+        num_dangers = self._occupied.shape[1] - 1
+        bandit = (layer.allocation + 1) * (num_dangers + 1) + layer.agent_danger + 1
+        return np.where(layer.player == Player.agent, 2 * layer.agent_code, 2 * bandit + 1)
+
+    def _expand(self, layer: _Layer, next_code: int):
+        children = _Children()
+        self._expand_agent(layer, np.flatnonzero(layer.player == Player.agent), children)
+        self._expand_bandit(layer, np.flatnonzero(layer.player == Player.bandit), children)
+        self._expand_chance(layer, np.flatnonzero(layer.player == Player.chance), children)
+        if not children.parent:
+            return layer, np.zeros(0, dtype=np.int64), None, None, None, next_code
+
+        parent = np.concatenate(children.parent)
+        action = np.concatenate(children.action)
+        order = np.lexsort((action, parent))
+        state = {name: np.concatenate([s[name] for s in children.states])[order] for name in children.states[0]}
+
+        # extend the agent's sequences, equal sequences get the same code
+        symbol = np.concatenate(children.symbol)[order]
+        extended = layer.agent_code[parent[order]] * NUM_SYMBOLS + symbol
+        unique, inverse = np.unique(extended, return_inverse=True)
+        state["agent_code"] = next_code + inverse.ravel()
+
+        return (_Layer(**state), parent[order], action[order], np.concatenate(children.chance_prob)[order],
+                np.concatenate(children.label)[order], next_code + len(unique))
+
+    def _possible_moves(self, cell: np.ndarray, visited: np.ndarray) -> np.ndarray:
+        # neighbors of every cell which weren't visited yet, -1 otherwise
+        neighbor = self._neighbor[cell]
+        n = np.maximum(neighbor, 0)
+        seen = visited[np.arange(len(cell))[:, np.newaxis], self._word[n]] >> self._bit[n] & np.uint64(1)
+        return np.where((neighbor >= 0) & (seen == 0), neighbor, -1)
+
+    def _expand_agent(self, layer: _Layer, nodes: np.ndarray, children: _Children):
+        if not len(nodes):
+            return
+        neighbor = self._possible_moves(layer.cell[nodes], layer.visited[nodes])
+        rows, moves = np.nonzero(neighbor >= 0)
+        action = (np.cumsum(neighbor >= 0, axis=1) - 1)[rows, moves]
+        parent = nodes[rows]
+        cell = neighbor[rows, moves]
+
+        state = layer.take(parent)
+        state["cell"] = cell
+        state["visited"][np.arange(len(cell)), self._word[cell]] |= np.uint64(1) << self._bit[cell]
+
+        # the first matching case decides the next player, see History.child
+        player = np.full(len(cell), Player.agent, dtype=np.int8)
+        terminal = (self._possible_moves(cell, state["visited"]) < 0).all(axis=1) | (cell == self.root.maze.goal_index)
+        gold = ~terminal & self._gold[cell]
+        danger = self._danger[cell]
+        dangerous = np.flatnonzero(~terminal & (danger >= 0) & (state["allocation"] >= 0))
+        occupied = np.zeros(len(cell), dtype=bool)
+        occupied[dangerous] = self._occupied[state["allocation"][dangerous], danger[dangerous]]
+        alarmed = ~terminal & (danger >= 0) & ~occupied & state["alarm"]
+        player[terminal] = Player.terminal
+        player[occupied] = Player.chance
+        state["num_golds"] = state["num_golds"] + gold
+        player[alarmed] = Player.bandit
+        state["agent_danger"] = np.where(alarmed, danger, state["agent_danger"])
+        state["player"] = player
+
+        symbols = np.array([MOVE_SYMBOLS[move] for move in _MOVES])
+        children.add(parent, action, moves + 1, symbols[moves], np.ones(len(parent)), state)
+
+    def _expand_bandit(self, layer: _Layer, nodes: np.ndarray, children: _Children):
+        if not len(nodes):
+            return
+        context = self.root.context
+        allocation, agent_danger = layer.allocation[nodes], layer.agent_danger[nodes]
+
+        # possible allocations of every distinct pair of the current allocation and agent's danger
+        pairs, inverse = np.unique(np.stack([allocation, agent_danger], axis=1), axis=0, return_inverse=True)
+        possible = [[self._allocation_index[a.indexes] for a in
+                     context.possible_allocations(self._combinations[c] if c >= 0 else (), d)]
+                    for c, d in pairs.tolist()]
+        table = np.full((len(pairs), max([len(p) for p in possible], default=0)), -1, dtype=np.int64)
+        for i, p in enumerate(possible):
+            table[i, :len(p)] = p
+        table = table[inverse.ravel()]
+        rows, action = np.nonzero(table >= 0)
+        parent = nodes[rows]
+        new_allocation = table[rows, action]
+
+        state = layer.take(parent)
+        # alarm is disabled after the first reallocation
+        state["alarm"] = state["alarm"] & (state["allocation"] < 0)
+        state["allocation"] = new_allocation
+        state["player"] = np.full(len(parent), Player.agent, dtype=np.int8)
+        children.add(parent, action, new_allocation + len(_MOVES) + 3, np.full(len(parent), ALLOCATION_SYMBOL),
+                     np.ones(len(parent)), state)
+
+    def _expand_chance(self, layer: _Layer, nodes: np.ndarray, children: _Children):
+        if not len(nodes):
+            return
+        hit_chance = self.root.hit_chance
+        for action, value in enumerate(Chance.possible()):
+            state = layer.take(nodes)
+            # alarm is disabled after the first attack
+            state["alarm"] = np.zeros(len(nodes), dtype=bool)
+            hit = value.value == Chance.HIT
+            state["player"] = np.full(len(nodes), Player.terminal if hit else Player.agent, dtype=np.int8)
+            children.add(nodes, np.full(len(nodes), action), np.full(len(nodes), len(_MOVES) + 1 + action),
+                         np.full(len(nodes), CHANCE_SYMBOL), np.full(len(nodes), hit_chance if hit else 1 - hit_chance),
+                         state)
+
+    @staticmethod
+    def _preorder(parent: np.ndarray, level_sizes: List[int]) -> np.ndarray:
+        # position of every node in the depth-first order, from the sizes of the subtrees
+        bounds = np.concatenate([[0], np.cumsum(level_sizes)])
+        size = np.ones(len(parent))
+        for d in range(len(level_sizes) - 1, 0, -1):
+            level = slice(bounds[d], bounds[d + 1])
+            size[bounds[d - 1]:bounds[d]] += np.bincount(parent[level] - bounds[d - 1], weights=size[level],
+                                                         minlength=level_sizes[d - 1])
+        preorder = np.zeros(len(parent), dtype=np.int64)
+        for d in range(1, len(level_sizes)):
+            level = slice(bounds[d], bounds[d + 1])
+            p = parent[level]
+            before = np.cumsum(size[level]) - size[level]
+            first = np.flatnonzero(np.diff(p, prepend=-1))
+            group_start = np.repeat(before[first], np.diff(np.append(first, len(p))))
+            preorder[level] = preorder[p] + 1 + (before - group_start).astype(np.int64)
+        return preorder
+
+    @staticmethod
+    def _first_seen(values: np.ndarray, preorder: np.ndarray) -> np.ndarray:
+        # index of every value in the order of their first occurrences in the depth-first order
+        order = np.argsort(preorder, kind="stable")
+        unique, first, inverse = np.unique(values[order], return_index=True, return_inverse=True)
+        rank = np.empty(len(unique), dtype=np.int64)
+        rank[np.argsort(first)] = np.arange(len(unique))
+        result = np.empty(len(values), dtype=np.int64)
+        result[order] = rank[inverse.ravel()]
+        return result
+
+
+def compile_tree_batched(root: History) -> CompiledTree:
+    # compile the tree of a game level by level, see BatchedExpansion
+    return BatchedExpansion(root).compile()
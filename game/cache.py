@@ -0,0 +1,117 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import Optional
+
+import numpy as np
+import scipy.sparse as sp
+
+from game.enums import Player
+from game.history import History
+from game.sequence_form import SequenceForm, Sequences
+from game.tree import CompiledTree
+
+# bump when the layout of the stored arrays changes
+CACHE_VERSION = 1
+
+
+class GameCache:
+    # content-addressed on-disk cache of compiled games.
+    #
+    # every game is stored in a directory named by the hash of its specification, one .npy file
+    # per array, so that the arrays are memory-mapped when loaded instead of read into memory.
+    # least recently used games are evicted once the total size exceeds max_bytes.
+
+    directory: str
+    max_bytes: int
+
+    def __init__(self, directory: str, max_bytes: int = 1 << 30):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(root: History) -> str:
+        maze = root.maze
+        spec = {
+            "version": CACHE_VERSION,
+            "maze": [[int(cell) for cell in row] for row in maze.data],
+            "start": [maze.start.x, maze.start.y],
+            "goal": [maze.goal.x, maze.goal.y],
+            "golds": [[loc.x, loc.y] for loc in maze.golds],
+            "dangers": [[loc.x, loc.y] for loc in maze.dangers],
+            "num_bandits": root.num_bandits,
+            "hit_chance": root.hit_chance,
+        }
+        return hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()
+
+    def load(self, root: History) -> Optional[SequenceForm]:
+        path = os.path.join(self.directory, self.key(root))
+        if not os.path.isdir(path):
+            return None
+        os.utime(path)  # mark as recently used
+
+        with open(os.path.join(path, "labels.json")) as f:
+            labels = json.load(f)
+        tree = CompiledTree.from_arrays(self._load_arrays(path, "tree", CompiledTree.ARRAYS), labels)
+        sequences = (
+            Sequences.from_arrays(Player(0), self._load_arrays(path, "sequences0", Sequences.ARRAYS)),
+            Sequences.from_arrays(Player(1), self._load_arrays(path, "sequences1", Sequences.ARRAYS)),
+        )
+        data, indices, indptr = self._load_arrays(path, "payoff", ("data", "indices", "indptr")).values()
+        payoff = sp.csr_matrix((data, indices, indptr), copy=False,
+                               shape=(sequences[0].num_sequences, sequences[1].num_sequences))
+        return SequenceForm.from_parts(tree, sequences, payoff)
+
+    def store(self, root: History, sequence_form: SequenceForm):
+        path = os.path.join(self.directory, self.key(root))
+        if os.path.isdir(path):
+            return
+
+        # write into a temporary directory first, so that partially written games are never loaded
+        tmp = tempfile.mkdtemp(dir=self.directory, prefix=".tmp-")
+        try:
+            with open(os.path.join(tmp, "labels.json"), "w") as f:
+                json.dump(sequence_form.tree.labels, f)
+            self._store_arrays(tmp, "tree", sequence_form.tree.arrays())
+            self._store_arrays(tmp, "sequences0", sequence_form.sequences[0].arrays())
+            self._store_arrays(tmp, "sequences1", sequence_form.sequences[1].arrays())
+            payoff = sequence_form.payoff
+            self._store_arrays(tmp, "payoff", {"data": payoff.data, "indices": payoff.indices, "indptr": payoff.indptr})
+            os.rename(tmp, path)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)
+            if not os.path.isdir(path):
+                raise
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        total = 0
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.startswith(".") or not os.path.isdir(path):
+                continue
+            # all files of the game, the labels may take more space than the arrays
+            size = sum(os.path.getsize(os.path.join(directory, file))
+                       for directory, _, files in os.walk(path) for file in files)
+            entries.append((os.stat(path).st_mtime, size, path))
+            total += size
+
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+    @staticmethod
+    def _store_arrays(path: str, group: str, arrays: dict):
+        os.mkdir(os.path.join(path, group))
+        for name, array in arrays.items():
+            np.save(os.path.join(path, group, f"{name}.npy"), np.asarray(array))
+
+    @staticmethod
+    def _load_arrays(path: str, group: str, names) -> dict:
+        return {name: np.load(os.path.join(path, group, f"{name}.npy"), mmap_mode="r") for name in names}
@@ -0,0 +1,104 @@
+import time
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+
+from game.enums import Player
+from game.exploitability import evaluate
+from game.sequence_form import SequenceForm, Sequences
+
+
+class CFRResult(NamedTuple):
+    values: Tuple[float, float]                # expected utility of both players, each from its own payoffs
+    strategies: Tuple[np.ndarray, np.ndarray]  # average realization plans of both players
+    exploitability: float                      # sum of both players' best response gains
+    iterations: int
+
+
+class CFRPlus:
+    # CFR+ over the sequence form of the game.
+    #
+    # counterfactual values of all sequences of a player are computed at once, level by level
+    # from the expected payoffs A y of the sequences, so regret matching and regret updates
+    # are vectorized over all infosets of a player. players are updated alternately and
+    # strategies are averaged with linearly increasing weights.
+
+    sequence_form: SequenceForm
+
+    # number of performed iterations
+    iteration: int
+
+    def __init__(self, sequence_form: SequenceForm):
+        self.sequence_form = sequence_form
+        self.iteration = 0
+
+        sequences = sequence_form.sequences
+        self._payoffs: Tuple[sp.csr_matrix, sp.csr_matrix] = (
+            sequence_form.player_payoff(Player(0)), sequence_form.player_payoff(Player(1)))
+        self._regrets: List[np.ndarray] = [np.zeros(s.num_sequences) for s in sequences]
+        self._behaviors: List[np.ndarray] = [s.uniform() for s in sequences]
+        self._realizations: List[np.ndarray] = [s.realization(s.uniform()) for s in sequences]
+        self._averages: List[np.ndarray] = [np.zeros(s.num_sequences) for s in sequences]
+        self._total_weight = 0.
+
+    def iterate(self):
+        self.iteration += 1
+        for player in (0, 1):
+            sequences = self.sequence_form.sequences[player]
+            self._averages[player] += self.iteration * self._realizations[player]
+
+            payoff = self._payoffs[player] @ self._realizations[1 - player]
+            sequence_values, infoset_values = sequences.values(payoff, self._behaviors[player])
+
+            regrets = self._regrets[player]
+            regrets += sequence_values - infoset_values[sequences.sequence_infoset]
+            np.maximum(regrets, 0., out=regrets)
+
+            self._behaviors[player] = self._regret_matching(sequences, regrets)
+            self._realizations[player] = sequences.realization(self._behaviors[player])
+        self._total_weight += self.iteration
+
+    def solve(self,
+              iterations: Optional[int] = None,
+              time_limit: Optional[float] = None,
+              target_exploitability: Optional[float] = None,
+              check_every: int = 10) -> CFRResult:
+        # iterate until any of the given limits is reached, may be called repeatedly
+        if iterations is None and time_limit is None and target_exploitability is None:
+            raise ValueError("At least one of iterations, time_limit or target_exploitability must be given")
+
+        start_iteration = self.iteration
+        start_time = time.perf_counter()
+        while True:
+            self.iterate()
+            done = self.iteration - start_iteration
+            if iterations is not None and done >= iterations:
+                break
+            if time_limit is not None and time.perf_counter() - start_time >= time_limit:
+                break
+            if target_exploitability is not None and done % check_every == 0 \
+                    and self.exploitability() <= target_exploitability:
+                break
+
+        return CFRResult(self.values(), self.average_strategies(), self.exploitability(), self.iteration)
+
+    def average_strategies(self) -> Tuple[np.ndarray, np.ndarray]:
+        if not self._total_weight:
+            return self._realizations[0], self._realizations[1]
+        return self._averages[0] / self._total_weight, self._averages[1] / self._total_weight
+
+    def values(self) -> Tuple[float, float]:
+        # expected utility of every player when both play the average strategies
+        x, y = self.average_strategies()
+        return float(x @ (self._payoffs[0] @ y)), float(y @ (self._payoffs[1] @ x))
+
+    def exploitability(self) -> float:
+        return evaluate(self.sequence_form, self.average_strategies()).exploitability
+
+    @staticmethod
+    def _regret_matching(sequences: Sequences, regrets: np.ndarray) -> np.ndarray:
+        totals = np.bincount(sequences.sequence_infoset, weights=regrets,
+                             minlength=sequences.num_infosets)[sequences.sequence_infoset]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(totals > 0, regrets / totals, sequences.uniform())
@@ -0,0 +1,66 @@
+from typing import Optional, Union
+
+from game import stats
+from game.batched import compile_tree_batched
+from game.cache import GameCache
+from game.history import History
+from game.parallel import compile_tree_parallel
+from game.sequence_form import SequenceForm
+from game.transposition import TranspositionTable
+from game.tree import CompiledTree, compile_tree
+
+
+def compile_game(root: Union[History, CompiledTree, SequenceForm],
+                 processes: Optional[int] = None,
+                 cache: Optional[GameCache] = None,
+                 batched: bool = False) -> CompiledTree:
+    # compile the tree of the game, subtrees of the initial allocations are compiled
+    # by a pool of processes if their number is given, or all nodes of a depth at once if batched
+    if isinstance(root, CompiledTree):
+        return root
+    if isinstance(root, SequenceForm) or cache is not None:
+        return compile_sequence_form(root, processes, cache, batched).tree
+    with stats.phase("compile"):
+        if batched:
+            tree = compile_tree_batched(root)
+        elif processes is not None:
+            tree = compile_tree_parallel(root, processes)
+        else:
+            transpositions = TranspositionTable()
+            tree = compile_tree(root, transpositions)
+            stats.count("transposition_hits", transpositions.hits)
+            stats.count("transposition_misses", transpositions.misses)
+    stats.record_tree(tree)
+    return tree
+
+
+def compile_sequence_form(root: Union[History, CompiledTree, SequenceForm],
+                          processes: Optional[int] = None,
+                          cache: Optional[GameCache] = None,
+                          batched: bool = False) -> SequenceForm:
+    # compile the tree of the game and its sequence form, or load both from the cache
+    if isinstance(root, SequenceForm):
+        return root
+    if isinstance(root, CompiledTree):
+        return _sequence_form(root)
+    if cache is None:
+        return _sequence_form(compile_game(root, processes, batched=batched))
+
+    with stats.phase("cache_load"):
+        sequence_form = cache.load(root)
+    if sequence_form is None:
+        sequence_form = _sequence_form(compile_game(root, processes, batched=batched))
+        with stats.phase("cache_store"):
+            cache.store(root, sequence_form)
+    else:
+        stats.count("cache_hits")
+        stats.record_tree(sequence_form.tree)
+        stats.record_sequence_form(sequence_form)
+    return sequence_form
+
+
+def _sequence_form(tree: CompiledTree) -> SequenceForm:
+    with stats.phase("sequence_form"):
+        sequence_form = SequenceForm(tree)
+    stats.record_sequence_form(sequence_form)
+    return sequence_form
@@ -0,0 +1,37 @@
+from typing import Dict, List, Tuple
+
+from game.actions import Allocation
+from game.infoset import InfosetRegistry
+from game.maze import Maze
+
+
+class GameContext:
+    # parameters of a single game and the state shared by all of its histories.
+    #
+    # every game has its own infoset registry, so games built or solved at the same time
+    # within one process don't affect each other's infoset indexes.
+
+    maze: Maze
+    num_bandits: int
+    hit_chance: float
+
+    infosets: InfosetRegistry
+
+    # (current allocation, agent's danger) -> possible allocations, see Allocation.possible
+    _allocations: Dict[Tuple[Tuple[int, ...], int], List[Allocation]]
+
+    def __init__(self, maze: Maze, num_bandits: int, hit_chance: float, interned: bool = True):
+        # agent's sequences are not interned by the registry unless interned, see InfosetRegistry
+        self.maze = maze
+        self.num_bandits = num_bandits
+        self.hit_chance = hit_chance
+        self.infosets = InfosetRegistry(num_bandits, num_dangers=len(maze.dangers), interned=interned)
+        self._allocations = {}
+
+    def possible_allocations(self, current_indexes: Tuple[int, ...], agent_index: int) -> List[Allocation]:
+        key = current_indexes, agent_index
+        possible = self._allocations.get(key)
+        if possible is None:
+            possible = self._allocations[key] = Allocation.possible(self.num_bandits, len(self.maze.dangers),
+                                                                    current_indexes, agent_index)
+        return list(possible)
@@ -0,0 +1,150 @@
+from typing import Callable, List, NamedTuple, Optional, Set, Tuple, Union
+
+import numpy as np
+import scipy.sparse as sp
+
+from game.backends import Backend, get_backend
+from game.enums import Player
+from game.exploitability import best_response
+from game.sequence_form import SequenceForm
+
+
+class Bounds(NamedTuple):
+    lower: float  # value guaranteed by the first player's restricted strategy
+    upper: float  # value guaranteed by the second player's restricted strategy
+
+
+class DoubleOracleResult(NamedTuple):
+    values: Tuple[float, float]                # expected utility of both players, each from its own restricted LP
+    strategies: Tuple[np.ndarray, np.ndarray]  # realization plans of both players
+    bounds: List[Bounds]                       # bounds of the value after every iteration
+    support: Tuple[int, int]                   # number of pure strategies of both players in the restricted game
+
+
+class DoubleOracle:
+    # double oracle over pure strategies of both players.
+    #
+    # the restricted game is a matrix game of the pure realization plans added so far, solved as a
+    # sequence form with a single infoset per player. mixtures of the restricted strategies are
+    # realization plans of the full game, so best responses to them on the full sequence form give
+    # the bounds of the value and the strategies added to the restricted game. the bounds meet
+    # once no best response improves, which happens after finitely many iterations.
+
+    sequence_form: SequenceForm
+    backend: Backend
+
+    # pure realization plans of both players in the restricted game, one per row
+    strategies: Tuple[sp.csr_matrix, sp.csr_matrix]
+
+    # payoff of the first player for every pair of the restricted strategies
+    matrix: np.ndarray
+
+    bounds: List[Bounds]
+
+    def __init__(self, sequence_form: SequenceForm, backend: Union[str, Backend] = "gurobi"):
+        self.sequence_form = sequence_form
+        self.backend = get_backend(backend) if isinstance(backend, str) else backend
+        self.bounds = []
+        self._seen: Tuple[Set[bytes], Set[bytes]] = (set(), set())
+
+        # start with a best response to the uniform strategy and a best response to it
+        sequences = sequence_form.sequences
+        x = best_response(sequence_form, Player(0), sequences[1].uniform(), behavioral=True).realization
+        y = best_response(sequence_form, Player(1), x).realization
+        self.strategies = (sp.csr_matrix((0, sequences[0].num_sequences)),
+                           sp.csr_matrix((0, sequences[1].num_sequences)))
+        self.matrix = np.zeros((0, 0))
+        self._add(Player(0), x)
+        self._add(Player(1), y)
+        self._mixtures: Tuple[np.ndarray, np.ndarray] = (np.ones(1), np.ones(1))
+        self._values: Tuple[float, float] = (float(self.matrix[0, 0]), -float(self.matrix[0, 0]))
+
+    def iterate(self) -> Tuple[Bounds, bool]:
+        # solve the restricted game, then extend it by best responses to its solution.
+        # returns the bounds and whether any of the best responses is new to the restricted game,
+        # if none is, the next iteration would be the same, so the restricted solution is final.
+        value0, p = self._solve_restricted(Player(0))
+        value1, q = self._solve_restricted(Player(1))
+        self._values = (value0, value1)
+        self._mixtures = (p, q)
+        x, y = self.realizations()
+
+        response0 = best_response(self.sequence_form, Player(0), y)
+        response1 = best_response(self.sequence_form, Player(1), x)
+        bounds = Bounds(-response1.value, response0.value)
+        self.bounds.append(bounds)
+
+        added0 = self._add(Player(0), response0.realization)
+        added1 = self._add(Player(1), response1.realization)
+        return bounds, added0 or added1
+
+    def solve(self,
+              max_iterations: Optional[int] = None,
+              tolerance: float = 1e-6,
+              callback: Optional[Callable[[int, Bounds], None]] = None) -> DoubleOracleResult:
+        # iterate until the bounds meet up to the tolerance relative to the value, which should be
+        # about the tolerance of the LP solver, or until no new strategy is added; may be called
+        # repeatedly. callback is called with the number of the iteration and the bounds after
+        # every iteration.
+        iteration = 0
+        while max_iterations is None or iteration < max_iterations:
+            iteration += 1
+            bounds, added = self.iterate()
+            if callback is not None:
+                callback(len(self.bounds), bounds)
+            scale = max(1., abs(bounds.lower), abs(bounds.upper))
+            if not added or bounds.upper - bounds.lower <= tolerance * scale:
+                break
+        return self.result()
+
+    def result(self) -> DoubleOracleResult:
+        return DoubleOracleResult(self._values, self.realizations(), list(self.bounds),
+                                  (self.strategies[0].shape[0], self.strategies[1].shape[0]))
+
+    def realizations(self) -> Tuple[np.ndarray, np.ndarray]:
+        # realization plans of the last solution of the restricted game,
+        # strategies added after it are played with zero probability
+        p, q = self._mixtures
+        return self.strategies[0][:len(p)].T @ p, self.strategies[1][:len(q)].T @ q
+
+    def _add(self, player: Player, realization: np.ndarray) -> bool:
+        # add a pure strategy to the restricted game unless it's already there
+        support = np.flatnonzero(realization)
+        key = support.tobytes()
+        if key in self._seen[player]:
+            return False
+        self._seen[player].add(key)
+
+        row = sp.csr_matrix((np.ones(len(support)), support, [0, len(support)]), shape=(1, len(realization)))
+        strategies = list(self.strategies)
+        strategies[player] = sp.vstack([strategies[player], row]).tocsr()
+        self.strategies = (strategies[0], strategies[1])
+
+        payoff = self.sequence_form.payoff
+        if player == 0:
+            column = self.strategies[1] @ (payoff.T @ realization)
+            self.matrix = np.vstack([self.matrix, column[np.newaxis, :]])
+        else:
+            column = self.strategies[0] @ (payoff @ realization)
+            self.matrix = np.hstack([self.matrix, column[:, np.newaxis]])
+        return True
+
+    def _solve_restricted(self, player: Player) -> Tuple[float, np.ndarray]:
+        # LP of a player in the restricted matrix game: every player has the empty sequence
+        # and a single infoset with an action per pure strategy.
+        # returns the value of the restricted game for the player and its mixture
+        num_strategies = self.matrix.shape
+        constraints = [self._constraints(k) for k in num_strategies]
+        payoff = sp.csr_matrix(np.pad(self.matrix, ((1, 0), (1, 0))))
+        A = payoff if player == 0 else -payoff.T.tocsr()
+        E, e = constraints[player]
+        F, f = constraints[1 - player]
+        solution = self.backend.solve(E, e, F, f, A)
+        mixture = np.clip(solution.realization[1:], 0., None)
+        return solution.value, mixture / mixture.sum()
+
+    @staticmethod
+    def _constraints(num_strategies: int) -> Tuple[sp.csr_matrix, np.ndarray]:
+        E = sp.csr_matrix(np.vstack([np.eye(1, num_strategies + 1),
+                                     np.concatenate([[-1.], np.ones(num_strategies)])]))
+        return E, np.array([1., 0.])
@@ -0,0 +1,191 @@
+import re
+from array import array
+from fractions import Fraction
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple
+
+from game.enums import Player, HistoryType
+from game.tree import CompiledTree
+
+# quoted strings (with escaped quotes), braces and commas, and other words
+_TOKEN = re.compile(r'"(?:[^"\\]|\\.)*"|[{},]|[^\s{},"]+')
+
+
+class _Tokens:
+    # tokens of a stream read in chunks, a chunk is tokenized up to its last complete line
+
+    def __init__(self, stream: TextIO, chunk_size: int = 1 << 20):
+        self._tokens = self._read(stream, chunk_size)
+        self._peeked: Optional[str] = None
+
+    def next(self) -> str:
+        if self._peeked is not None:
+            token, self._peeked = self._peeked, None
+            return token
+        token = next(self._tokens, None)
+        if token is None:
+            raise ValueError("Unexpected end of the file")
+        return token
+
+    def peek(self) -> Optional[str]:
+        if self._peeked is None:
+            self._peeked = next(self._tokens, None)
+        return self._peeked
+
+    def expect(self, expected: str):
+        token = self.next()
+        if token != expected:
+            raise ValueError(f"Expected {expected}, got {token}")
+
+    @staticmethod
+    def _read(stream: TextIO, chunk_size: int) -> Iterator[str]:
+        rest = ""
+        while True:
+            chunk = stream.read(chunk_size)
+            buffer = rest + chunk
+            end = buffer.rfind("\n") + 1 if chunk else len(buffer)
+            # don't split a quoted string spanning multiple lines
+            while end and (buffer.count('"', 0, end) - buffer.count('\\"', 0, end)) % 2:
+                end = buffer.rfind("\n", 0, end - 1) + 1
+            yield from _TOKEN.findall(buffer, 0, end)
+            rest = buffer[end:]
+            if not chunk:
+                if rest.strip():
+                    raise ValueError("Unterminated quoted string")
+                return
+
+
+def _number(token: str) -> float:
+    # numbers are decimals or rationals
+    return float(Fraction(token)) if "/" in token else float(token)
+
+
+def read_efg(stream: TextIO) -> CompiledTree:
+    # compiled tree of a two-player zero-sum game in the Gambit .efg format.
+    #
+    # nodes are read one by one into typed arrays, without creating an object per node, so the
+    # memory used is that of the compiled tree. infosets keep the numbers of the file, which are
+    # numbered per player, outcomes of non-terminal nodes are added to the terminal utilities.
+    tokens = _Tokens(stream)
+    tokens.expect("EFG")
+    tokens.expect("2")
+    if tokens.next() != "R":
+        raise ValueError("Only games with rational or decimal payoffs are supported")
+    tokens.next()  # title
+    tokens.expect("{")
+    num_players = 0
+    while tokens.next() != "}":
+        num_players += 1
+    if num_players != 2:
+        raise ValueError("Only two-player games are supported")
+    if tokens.peek() is not None and tokens.peek().startswith('"'):
+        tokens.next()  # comment
+
+    node_type, player, infoset, label = array("b"), array("b"), array("i"), array("i")
+    parent, action, depth = array("i"), array("i"), array("i")
+    chance_prob, utility = array("d"), array("d")
+    labels: Dict[str, int] = {"": 0}
+
+    # actions of the infosets as label indexes, and probabilities of chance actions
+    actions: Dict[Tuple[int, int], List[int]] = {}
+    probs: Dict[int, List[float]] = {}
+    # utility of the first player for every outcome
+    outcomes: Dict[int, float] = {0: 0.}
+
+    # nodes with children still to be read:
+    # [node, next action, labels, probabilities, accumulated utility, depth of the children]
+    stack: List[list] = []
+
+    while tokens.peek() is not None:
+        kind = tokens.next()
+        node = len(node_type)
+        if stack:
+            frame = stack[-1]
+            parent.append(frame[0])
+            action.append(frame[1])
+            label.append(frame[2][frame[1]])
+            chance_prob.append(frame[3][frame[1]] if frame[3] is not None else 1.)
+            depth.append(frame[5])
+            accumulated = frame[4]
+            frame[1] += 1
+            if frame[1] == len(frame[2]):
+                stack.pop()
+        elif node:
+            raise ValueError("Nodes after the end of the tree")
+        else:
+            parent.append(-1)
+            action.append(-1)
+            label.append(0)
+            chance_prob.append(1.)
+            depth.append(0)
+            accumulated = 0.
+
+        tokens.next()  # name of the node
+        if kind == "t":
+            node_type.append(HistoryType.terminal)
+            player.append(Player.terminal)
+            infoset.append(-1)
+            utility.append(accumulated + _read_outcome(tokens, outcomes))
+            continue
+
+        if kind == "p":
+            node_player = int(tokens.next()) - 1
+            node_type.append(HistoryType.decision)
+            player.append(node_player)
+        elif kind == "c":
+            node_player = Player.chance
+            node_type.append(HistoryType.chance)
+            player.append(Player.chance)
+        else:
+            raise ValueError(f"Unknown node type: {kind}")
+
+        number = int(tokens.next())
+        key = (node_player, number)
+        if (tokens.peek() or "").startswith('"'):
+            tokens.next()  # name of the infoset
+        if tokens.peek() == "{":
+            tokens.next()
+            names, chance = [], []
+            while tokens.peek() != "}":
+                name = tokens.next()[1:-1]
+                names.append(labels.setdefault(name, len(labels)))
+                if kind == "c":
+                    chance.append(_number(tokens.next()))
+            tokens.next()
+            actions[key] = names
+            if kind == "c":
+                probs[number] = chance
+        elif key not in actions:
+            raise ValueError(f"Actions of infoset {number} are not defined")
+
+        infoset.append(number if kind == "p" else -1)
+        utility.append(0.)
+        accumulated += _read_outcome(tokens, outcomes)
+        stack.append([node, 0, actions[key], probs[number] if kind == "c" else None, accumulated, depth[node] + 1])
+
+    if stack or not node_type:
+        raise ValueError("Incomplete tree")
+
+    return CompiledTree.from_depth_first(node_type, parent, player, infoset, action, chance_prob, utility, depth,
+                                         label, list(labels))
+
+
+def _read_outcome(tokens: _Tokens, outcomes: Dict[int, float]) -> float:
+    # utility of the first player of an outcome, which is defined by its first occurrence
+    number = int(tokens.next())
+    if tokens.peek() is not None and tokens.peek().startswith('"'):
+        tokens.next()  # name of the outcome
+    if tokens.peek() == "{":
+        tokens.next()
+        payoffs = []
+        while True:
+            token = tokens.next()
+            if token == "}":
+                break
+            if token != ",":
+                payoffs.append(_number(token))
+        if len(payoffs) != 2 or abs(payoffs[0] + payoffs[1]) > 1e-9 * max(1., abs(payoffs[0])):
+            raise ValueError("Only zero-sum games are supported")
+        outcomes[number] = payoffs[0]
+    if number not in outcomes:
+        raise ValueError(f"Payoffs of outcome {number} are not defined")
+    return outcomes[number]
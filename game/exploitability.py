@@ -0,0 +1,61 @@
+from typing import NamedTuple, Sequence, Tuple
+
+import numpy as np
+
+from game.enums import Player
+from game.sequence_form import SequenceForm, Sequences
+
+
+class BestResponse(NamedTuple):
+    value: float             # expected utility of the best responding player
+    realization: np.ndarray  # pure realization plan of the best response
+
+
+class Evaluation(NamedTuple):
+    value: float                        # expected utility of the first player if both play their strategies
+    best_responses: Tuple[float, float]  # value of every player's best response against the other strategy
+    exploitability: float               # sum of both players' gains by best responding, 0 in an equilibrium
+
+
+def realization_plan(sequences: Sequences, strategy: np.ndarray, behavioral: bool = False) -> np.ndarray:
+    # strategies are given either as realization plans or as behavioral strategies,
+    # i.e. probabilities of the last action of every sequence
+    return sequences.realization(strategy) if behavioral else np.asarray(strategy, dtype=np.float64)
+
+
+def best_response(sequence_form: SequenceForm,
+                  player: Player,
+                  opponent_strategy: np.ndarray,
+                  behavioral: bool = False) -> BestResponse:
+    # best response of a player against a fixed strategy of the opponent, computed by a single
+    # pass over the player's infosets from the expected payoffs of the player's sequences
+    sequences = sequence_form.sequences[player]
+    opponent = realization_plan(sequence_form.sequences[1 - player], opponent_strategy, behavioral)
+    sequence_values, infoset_values = sequences.values(expected_payoff(sequence_form, player, opponent))
+
+    # the first of the best actions in every infoset
+    best = np.flatnonzero(sequence_values == infoset_values[sequences.sequence_infoset])
+    _, first = np.unique(sequences.sequence_infoset[best], return_index=True)
+    behavior = np.zeros(sequences.num_sequences)
+    behavior[best[first]] = 1.
+    return BestResponse(float(infoset_values[0]), sequences.realization(behavior))
+
+
+def evaluate(sequence_form: SequenceForm,
+             strategies: Sequence[np.ndarray],
+             behavioral: bool = False) -> Evaluation:
+    # value of a strategy profile, best responses of both players against it and its exploitability
+    sequences = sequence_form.sequences
+    x, y = [realization_plan(s, strategy, behavioral) for s, strategy in zip(sequences, strategies)]
+    expected = expected_payoff(sequence_form, Player(0), y)
+    best_responses = (float(sequences[0].best_response(expected)),
+                      float(sequences[1].best_response(expected_payoff(sequence_form, Player(1), x))))
+    return Evaluation(float(x @ expected), best_responses, best_responses[0] + best_responses[1])
+
+
+def expected_payoff(sequence_form: SequenceForm, player: Player, opponent_realization: np.ndarray) -> np.ndarray:
+    # expected payoff of every sequence of a player against the opponent's realization plan,
+    # the transposed payoff matrix is a view, so it is not built for the second player
+    if player == 0:
+        return sequence_form.payoff @ opponent_realization
+    return -(sequence_form.payoff.T @ opponent_realization)
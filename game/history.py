@@ -1,35 +1,86 @@
-from copy import deepcopy
-from typing import List
+from copy import copy
+from typing import Hashable, List, Optional, Tuple
 
 from . import (
     Action, Move, Allocation, Chance, Maze,
     Player, HistoryType, Infoset, Location
 )
+from .context import GameContext
+from .path import Path
 
 UTILITY = 10.0
 
 
 class History:
-    history: List[Action] = []
+    # histories are persistent: a child shares the path of actions with its parent
+    # instead of copying it, so it is created in O(1).
+    __slots__ = ("history", "context", "alarm", "num_golds", "player",
+                 "_cell", "_visited", "_bandits", "_agent_code", "_allocation", "_agent_danger")
+
+    history: Path  # of Action
+
+    context: GameContext
+
+    alarm: bool
+    num_golds: int
+    player: Player
+
+    # maze cells are indexed by integers, see Maze
+    _cell: int     # agent's cell
+    _visited: int  # bitmask of cells visited by the agent
+    _bandits: int  # bitmask of cells occupied by bandits
+
+    # incrementally maintained parts of the infoset keys
+    _agent_code: int
+    _allocation: Tuple[int, ...]
+    _agent_danger: int
+
+    def __init__(self, context: GameContext):
+        maze = context.maze
+        self.context = context
+
+        self.history = Path()
+        self.alarm = True
+        self.num_golds = 0
+        self.player = Player.bandit
+
+        self._cell = maze.index(maze.start)
+        self._visited = 1 << self._cell
+        self._bandits = 0
+
+        self._agent_code = 0
+        self._allocation = ()
+        self._agent_danger = -1
+
+    def __copy__(self) -> 'History':
+        history = History.__new__(History)
+        history.history = self.history
+        history.context = self.context
+        history.alarm = self.alarm
+        history.num_golds = self.num_golds
+        history.player = self.player
+        history._cell = self._cell
+        history._visited = self._visited
+        history._bandits = self._bandits
+        history._agent_code = self._agent_code
+        history._allocation = self._allocation
+        history._agent_danger = self._agent_danger
+        return history
 
-    maze: Maze
-    num_bandits: int
-    hit_chance: float
+    def __str__(self) -> str:
+        return ""
 
-    alarm: bool = True
-    num_golds: int = 0
-    player: Player = Player.bandit
-    bandit_locations: List[Location] = []
-    visited_locations: List[Location] = []
+    @property
+    def maze(self) -> Maze:
+        return self.context.maze
 
-    def __init__(self, maze: Maze, num_bandits: int, hit_chance: float):
-        self.maze = maze
-        self.num_bandits = num_bandits
-        self.hit_chance = hit_chance
-        self.visited_locations.append(maze.start)
+    @property
+    def num_bandits(self) -> int:
+        return self.context.num_bandits
 
-    def __str__(self) -> str:
-        return ""
+    @property
+    def hit_chance(self) -> float:
+        return self.context.hit_chance
 
     def type(self) -> HistoryType:
         if self.player == Player.chance:
@@ -44,55 +95,85 @@ class History:
 
     def infoset(self) -> Infoset:
         assert self.player in [Player.agent, Player.bandit]
-        return Infoset(self.player, self._agent_location, self.bandit_locations, self.maze.dangers, self.history)
+        infosets = self.context.infosets
+        if self.player == Player.agent:
+            key = infosets.agent_key(self._agent_code)
+        else:
+            key = infosets.bandit_key(self._allocation, self._agent_danger)
+        return Infoset(self.player, key, infosets)
 
     def actions(self) -> List[Action]:
         assert self.player in [Player.agent, Player.bandit, Player.chance]
+        context = self.context
         if self.player == Player.agent:
-            return Move.possible(self.maze, self._agent_location, self.visited_locations)
+            return Move.possible(context.maze, self._cell, self._visited)
         elif self.player == Player.bandit:
-            return Allocation.possible(self.num_bandits, self.maze.dangers, self.bandit_locations, self._agent_location)
+            return context.possible_allocations(self._allocation, self._agent_danger)
         else:
             return Chance.possible()
 
+    def state_key(self) -> Hashable:
+        # canonical game state: histories with the same state have the same actions,
+        # utilities and shape of their subtrees, but not necessarily the same infosets
+        return self.player, self._cell, self._visited, self._allocation, self.alarm, self.num_golds
+
+    def subtree_key(self) -> Optional[Hashable]:
+        # canonical state of the whole subtree including the infosets of its histories.
+        #
+        # subtrees of two histories can only be the same if the histories differ in the initial
+        # bandit allocation but end up in the same reallocation; they are in the same infosets
+        # as long as agent's sequences are of the same type, because no bandit decisions follow.
+        # None is returned for the histories which can't be reached by different paths this way.
+        if self.alarm or not isinstance(self.history.last, Allocation):
+            return None
+        return self._agent_code, self.state_key()
+
     def utility(self) -> float:
         assert self.type() == HistoryType.terminal
-        if self._agent_location == self.maze.goal:
+        if self._cell == self.context.maze.goal_index:
             return UTILITY + self.num_golds
         return 0.
 
     def chance_prob(self, action: Action) -> float:
         assert self.type() == HistoryType.chance and isinstance(action, Chance)
-        return self.hit_chance if action.value == Chance.HIT else 1 - self.hit_chance
+        hit_chance = self.context.hit_chance
+        return hit_chance if action.value == Chance.HIT else 1 - hit_chance
 
     def child(self, action: Action) -> 'History':
-        child = self._clone()
-        child.history.append(action)
+        child = copy(self)
+        child.history = self.history.append(action)
+        child._agent_code = self.context.infosets.extend(self._agent_code, action)
 
         if isinstance(action, Move):
-            loc = child._agent_location.add(action.dx, action.dy)
-            child.visited_locations.append(loc)
+            maze = child.context.maze
+            cell = child._cell + action.dy * maze.width + action.dx
+            child._cell = cell
+            child._visited |= 1 << cell
 
-            if not Move.possible(child.maze, loc, child.visited_locations):
+            if not Move.possible(maze, cell, child._visited):
                 child.player = Player.terminal
 
-            elif loc == child.maze.goal:
+            elif cell == maze.goal_index:
                 child.player = Player.terminal
 
-            elif loc in child.maze.golds:
+            elif maze.gold_mask >> cell & 1:
                 child.num_golds += 1
 
-            elif loc in child.maze.dangers:
-                if loc in child.bandit_locations:
+            elif maze.danger_mask >> cell & 1:
+                if child._bandits >> cell & 1:
                     child.player = Player.chance
                 elif child.alarm:
                     child.player = Player.bandit
+                    child._agent_danger = maze.danger_indexes[cell]
 
         elif isinstance(action, Allocation):
             # disable alarm after the first reallocation
-            if child.bandit_locations:
+            if child._allocation:
                 child.alarm = False
-            child.bandit_locations = [child.maze.dangers[i] for i in action.indexes]
+            child._allocation = action.indexes
+            child._bandits = 0
+            for i in action.indexes:
+                child._bandits |= 1 << child.context.maze.danger_cells[i]
             child.player = Player.agent
 
         elif isinstance(action, Chance):
@@ -109,15 +190,10 @@ class History:
         return child
 
     @property
-    def _agent_location(self):
-        return self.visited_locations[-1]
-
-    def _clone(self) -> 'History':
-        clone = History(self.maze, self.num_bandits, self.hit_chance)
-        clone.player = self.player
-        clone.alarm = self.alarm
-        clone.num_golds = self.num_golds
-        clone.history = deepcopy(self.history)
-        clone.visited_locations = deepcopy(self.visited_locations)
-        clone.bandit_locations = deepcopy(self.bandit_locations)
-        return clone
+    def bandit_locations(self) -> List[Location]:
+        return [self.maze.dangers[i] for i in self._allocation]
+
+    @property
+    def visited_locations(self) -> List[Location]:
+        # in the order of cell indexes
+        return [loc for cell, loc in enumerate(self.maze.locations) if self._visited >> cell & 1]
@@ -2,93 +2,141 @@ import itertools
 from typing import List, Tuple, Dict
 
 from game.actions import Action, Move, Allocation, Chance
-from game.location import Location
-from enums import Player
+from game.enums import Player
 
+# symbols encoding the type of an action in agent's sequences of actions
+MOVE_SYMBOLS: Dict[Tuple[int, int], int] = {(0, -1): 0, (0, 1): 1, (-1, 0): 2, (1, 0): 3}
+ALLOCATION_SYMBOL = 4
+CHANCE_SYMBOL = 5
+NUM_SYMBOLS = 6
 
-class Infoset:
-    # code -> index mapping
-    _codes: Dict[str, int]
+
+class InfosetRegistry:
+    # indexes and keys of the infosets of a single game, owned by its GameContext
+
+    # key -> index mapping
+    _codes: Dict[Tuple[int, ...], int]
 
     # index of a next created Infoset
     _current_idx: int
 
-    # pre-computed list of all possible bandit allocations
-    _allocations: List[Tuple[int]]
+    # pre-computed mapping of all possible bandit allocations to their indexes
+    _allocations: Dict[Tuple[int, ...], int]
 
-    @classmethod
-    def init(cls, num_bandits: int, num_dangers: int):
-        assert 0 < num_bandits <= num_dangers
+    # (code of a sequence of symbols, appended symbol) -> code of the extended sequence.
+    # codes are assigned incrementally, 0 is the code of an empty sequence.
+    _sequences: Dict[int, int]
 
-        cls._codes = {}
-        cls._current_idx = 1
-        danger_indexes: List[int] = list(range(num_dangers))
-        cls._allocations = list(itertools.combinations(danger_indexes, num_bandits))
-
-    def __init__(self,
-                 player: Player,
-                 agent: Location,
-                 bandits: List[Location],
-                 dangers: List[Location],
-                 history: List[Action]):
-        self.player = player
-        self.agent = agent
-        self.bandits = bandits
-        self.dangers = dangers
-        self.history = history
+    # code -> (code of the sequence without the last symbol, last symbol)
+    _prefixes: List[Tuple[int, int]]
 
-    def __str__(self):
-        return f"I{self.index()}"
+    # codes of sequences which are not interned are the sequences themselves as numbers in base
+    # NUM_SYMBOLS + 1, so the memory of the registry doesn't grow with the expanded histories
+    _interned: bool
 
-    def index(self) -> int:
-        code = self.encode()
-        if Infoset._codes.get(code) is None:
-            Infoset._codes[code] = Infoset._current_idx
-            Infoset._current_idx += 1
-        return Infoset._codes[code]
-
-    def encode(self) -> str:
-        if self.player == Player.bandit:
-            return self._encode_bandit_history()
-        else:
-            return self._encode_agent_history()
+    def __init__(self, num_bandits: int, num_dangers: int, interned: bool = True):
+        assert 0 < num_bandits <= num_dangers
+
+        self._interned = interned
+        self._codes = {}
+        self._current_idx = 1
+        self._sequences = {}
+        self._prefixes = [(-1, -1)]
+        danger_indexes = range(num_dangers)
+        self._allocations = {a: i for i, a in enumerate(itertools.combinations(danger_indexes, num_bandits))}
 
-    def _encode_bandit_history(self) -> str:
+    def extend(self, code: int, action: Action) -> int:
+        # two agent histories are in the same infoset if:
+        # 1. agent's actions sequences are exactly same
+        # 2. non-agent's actions sequences are of the same type
+        # so every action is encoded by its type only, except for moves.
+        if isinstance(action, Move):
+            symbol = MOVE_SYMBOLS[action.dx, action.dy]
+        elif isinstance(action, Allocation):
+            symbol = ALLOCATION_SYMBOL
+        elif isinstance(action, Chance):
+            symbol = CHANCE_SYMBOL
+        else:
+            raise TypeError(f"Unknown action type: {action.__class__.__name__}")
+        return self._extend(code, symbol)
+
+    def _extend(self, code: int, symbol: int) -> int:
+        if not self._interned:
+            return code * (NUM_SYMBOLS + 1) + symbol + 1
+        key = code * NUM_SYMBOLS + symbol
+        extended = self._sequences.get(key)
+        if extended is None:
+            extended = self._sequences[key] = len(self._prefixes)
+            self._prefixes.append((code, symbol))
+        return extended
+
+    @staticmethod
+    def agent_key(code: int) -> Tuple[int, ...]:
+        return Player.agent, code
+
+    def bandit_key(self, allocation: Tuple[int, ...], agent_danger: int) -> Tuple[int, ...]:
         # empty history (initial allocation node) is the only one in its infoset.
         # any other two bandit histories are in the same infoset if:
         # 1. initial bandit allocations are the same.
         # 2. alarm was triggered by the agent in the same empty dangerous place.
+        if not allocation:
+            return Player.bandit,
+        return Player.bandit, self._allocations[allocation], agent_danger
+
+    def index(self, key: Tuple[int, ...]) -> int:
+        idx = self._codes.get(key)
+        if idx is None:
+            idx = self._codes[key] = self._current_idx
+            self._current_idx += 1
+        return idx
+
+    def keys(self) -> List[Tuple[int, ...]]:
+        # keys of all indexed infosets, key of the infoset with index i is at position i - 1
+        return list(self._codes)
+
+    def export_key(self, key: Tuple[int, ...]) -> Tuple[int, ...]:
+        # key which doesn't depend on the order in which agent's sequences were encoded,
+        # so that it can be compared with keys of other registries
+        if key[0] != Player.agent:
+            return key
+        symbols = []
+        code = key[1]
+        while code:
+            if self._interned:
+                code, symbol = self._prefixes[code]
+            else:
+                code, symbol = divmod(code, NUM_SYMBOLS + 1)
+                symbol -= 1
+            symbols.append(symbol)
+        return (Player.agent,) + tuple(reversed(symbols))
 
-        # allocation node
-        # ---------------
-        if not self.bandits:
-            return "bandit:root"
+    def import_key(self, key: Tuple[int, ...]) -> Tuple[int, ...]:
+        # inverse of export_key
+        if key[0] != Player.agent:
+            return key
+        code = 0
+        for symbol in key[1:]:
+            code = self._extend(code, symbol)
+        return self.agent_key(code)
 
-        # reallocation node
-        # -----------------
-        # get the index of the initial bandits allocation
-        allocation = tuple([self.dangers.index(bandit) for bandit in self.bandits])
-        allocation_index = self._allocations.index(allocation)
 
-        # get the index of an empty dangerous place visited by the agent
-        empty = [d for d in self.dangers if d not in self.bandits]
-        empty_index = empty.index(self.agent)
+class Infoset:
+    __slots__ = ("player", "key", "registry")
 
-        return f"bandit:A{allocation_index}E{empty_index}"
+    player: Player
+    key: Tuple[int, ...]
+    registry: InfosetRegistry
 
-    def _encode_agent_history(self) -> str:
-        # two agent histories are in the same infoset if:
-        # 1. agent's actions sequences are exactly same
-        # 2. non-agent's actions sequences are of the same type
-        symbols: List[str] = []
-        for action in self.history:
-            if isinstance(action, Move):
-                symbols.append(str(action)[0])  # {"U", "D", "L", "R"}
-            elif isinstance(action, Allocation):
-                symbols.append("A")
-            elif isinstance(action, Chance):
-                symbols.append("C")
-            else:
-                raise TypeError(f"Unknown action type: {action.__class__.__name__}")
+    def __init__(self, player: Player, key: Tuple[int, ...], registry: InfosetRegistry):
+        self.player = player
+        self.key = key
+        self.registry = registry
+
+    def __str__(self):
+        return f"I{self.index()}"
+
+    def index(self) -> int:
+        return self.registry.index(self.key)
 
-        return f"agent:{''.join(symbols)}"
+    def encode(self) -> Tuple[int, ...]:
+        return self.key
@@ -0,0 +1,170 @@
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple
+
+from game.actions import Action
+from game.context import GameContext
+from game.enums import HistoryType
+from game.history import History
+from game.infoset import Infoset
+from game.transposition import TranspositionTable
+
+
+class NodeId:
+    # node of a lazy tree, identified by the indexes of the actions leading to it from the root.
+    # the indexes are a linked list shared with the ancestors, so a child is created in O(1).
+    # the hash of the list is computed once, but nodes are equal only if their lists are, so
+    # two nodes with colliding hashes are never mistaken for each other in the store.
+    __slots__ = ("parent", "action", "depth", "_hash")
+
+    parent: Optional['NodeId']
+    action: int
+    depth: int
+    _hash: int
+
+    def __init__(self, parent: Optional['NodeId'] = None, action: int = -1):
+        self.parent = parent
+        self.action = action
+        self.depth = parent.depth + 1 if parent is not None else 0
+        self._hash = hash((parent._hash, action)) if parent is not None else 0
+
+    def child(self, action: int) -> 'NodeId':
+        return NodeId(self, action)
+
+    def path(self) -> List[int]:
+        # indexes of the actions leading to the node
+        actions = []
+        node = self
+        while node.parent is not None:
+            actions.append(node.action)
+            node = node.parent
+        actions.reverse()
+        return actions
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, NodeId) or self.depth != other.depth:
+            return False
+        # compare the actions up to the closest common ancestor, which is usually the parent
+        node = self
+        while node is not other:
+            if node._hash != other._hash or node.action != other.action:
+                return False
+            node, other = node.parent, other.parent
+        return True
+
+    def __hash__(self) -> int:
+        return self._hash
+
+
+ROOT = NodeId()
+
+
+class LazyTree:
+    # view of a game tree which expands the nodes only on demand.
+    #
+    # expanded nodes are kept in a store bounded by max_nodes, the least recently used ones are
+    # evicted. evicted nodes are regenerated by replaying their actions from the closest stored
+    # ancestor, which is deterministic because a history always generates the same actions in
+    # the same order, so the memory used doesn't depend on the size of the tree.
+    #
+    # the histories have their own GameContext, which doesn't intern agent's sequences, so that
+    # its registry only grows with the infosets whose indexes are queried.
+    #
+    # NOTE: infosets are indexed in the order in which they are queried, which is not the order
+    # of compile_tree unless they are queried in the depth-first order, e.g. by walk().
+    # use Infoset.key to identify infosets independently of the order.
+
+    context: GameContext
+    root: History
+    store: TranspositionTable  # NodeId -> (History, actions)
+
+    # number of expanded nodes, including the ones expanded again after their eviction
+    expanded: int
+
+    def __init__(self, root: History, max_nodes: int = 1_000_000):
+        assert not root.history, "Root of the game is expected"
+        context = root.context
+        self.context = GameContext(context.maze, context.num_bandits, context.hit_chance, interned=False)
+        self.root = History(self.context)
+        self.store = TranspositionTable(max_nodes)
+        self.expanded = 0
+        self._root_entry = (self.root, self._actions(self.root))
+
+    def history(self, node: NodeId) -> History:
+        return self._entry(node)[0]
+
+    def actions(self, node: NodeId) -> List[Action]:
+        return self._entry(node)[1]
+
+    def children(self, node: NodeId) -> List[NodeId]:
+        return [node.child(i) for i in range(len(self.actions(node)))]
+
+    def type(self, node: NodeId) -> HistoryType:
+        return self.history(node).type()
+
+    def infoset(self, node: NodeId) -> Infoset:
+        return self.history(node).infoset()
+
+    def utility(self, node: NodeId) -> float:
+        return self.history(node).utility()
+
+    def chance_probs(self, node: NodeId) -> List[float]:
+        history, actions = self._entry(node)
+        return [history.chance_prob(a) for a in actions]
+
+    def walk(self) -> Iterator[Tuple[NodeId, History, List[Action]]]:
+        # nodes in the depth-first order with their histories and actions. every node is expanded
+        # once: the stack holds the unvisited siblings of the current path, but the store isn't used.
+        stack = [(ROOT, self.root)]
+        while stack:
+            node, history = stack.pop()
+            actions = self._actions(history)
+            self.expanded += 1
+            yield node, history, actions
+            stack.extend([(node.child(i), history.child(actions[i])) for i in reversed(range(len(actions)))])
+
+    def expected_utility(self, strategy: Callable[[History], Sequence[float]]) -> float:
+        # expected utility of the first player if both players play a given behavioral strategy,
+        # which maps a decision history to the probabilities of its actions.
+        # only the current path and the siblings of its nodes are held.
+        total = 0.
+        stack = [(self.root, 1.)]
+        while stack:
+            history, prob = stack.pop()
+            self.expanded += 1
+            h_type = history.type()
+            if h_type == HistoryType.terminal:
+                total += prob * history.utility()
+                continue
+            actions = history.actions()
+            probs = [history.chance_prob(a) for a in actions] if h_type == HistoryType.chance else strategy(history)
+            stack.extend([(history.child(a), prob * p) for a, p in zip(actions, probs) if p > 0])
+        return total
+
+    def _entry(self, node: NodeId) -> Tuple[History, List[Action]]:
+        if node.parent is None:
+            return self._root_entry
+        entry = self.store.get(node)
+        if entry is not None:
+            return entry
+
+        # the closest expanded ancestor, the root is always kept
+        ancestor = node.parent
+        while ancestor.parent is not None and ancestor not in self.store:
+            ancestor = ancestor.parent
+        history, actions = self._entry(ancestor)
+
+        # nodes on the way are stored too, as their siblings are likely to be visited next
+        path = []
+        while node is not ancestor:
+            path.append(node)
+            node = node.parent
+        for node in reversed(path):
+            history = history.child(actions[node.action])
+            entry = (history, self._actions(history))
+            self.store.put(node, entry)
+            self.expanded += 1
+            actions = entry[1]
+        return entry
+
+    @staticmethod
+    def _actions(history: History) -> List[Action]:
+        return history.actions() if history.type() != HistoryType.terminal else []
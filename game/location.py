@@ -2,11 +2,17 @@ from dataclasses import dataclass
 from typing import Tuple
 
 
-@dataclass
+@dataclass(frozen=True)
 class Location:
+    __slots__ = ("x", "y")
+
     x: int
     y: int
 
+    def __reduce__(self):
+        # frozen slots can't be restored by the default pickling
+        return Location, (self.x, self.y)
+
     def add(self, dx: int, dy: int) -> 'Location':
         loc = Location(self.x + dx, self.y + dy)
         return loc
@@ -1,5 +1,5 @@
 from enum import IntEnum
-from typing import List
+from typing import Dict, List, Tuple
 
 from game.location import Location
 
@@ -16,6 +16,17 @@ class Maze:
     golds: List[Location]
     dangers: List[Location]
 
+    # cells are indexed by integers y * width + x, sets of cells are represented as bitmasks
+    locations: List[Location]
+    goal_index: int
+    gold_mask: int
+    danger_mask: int
+    danger_cells: List[int]
+    danger_indexes: Dict[int, int]  # cell -> index of the danger
+
+    # free neighbors of every cell as (cell, dx, dy) tuples
+    _moves: List[List[Tuple[int, int, int]]]
+
     def __init__(self,
                  data: List[List[Cell]],
                  start: Location,
@@ -30,6 +41,27 @@ class Maze:
         self.golds = golds
         self.dangers = dangers
 
+        self.locations = [Location(x, y) for y in range(self.height) for x in range(self.width)]
+        self.goal_index = self.index(goal)
+        self.gold_mask = 0
+        for gold in golds:
+            self.gold_mask |= 1 << self.index(gold)
+        self.danger_cells = [self.index(danger) for danger in dangers]
+        self.danger_mask = 0
+        for cell in self.danger_cells:
+            self.danger_mask |= 1 << cell
+        self.danger_indexes = {cell: i for i, cell in enumerate(self.danger_cells)}
+
+        self._moves = []
+        for location in self.locations:
+            moves = []
+            if self.is_free(location):
+                for dx, dy in [(1, 0), (0, 1), (-1, 0), (0, -1)]:
+                    loc = location.add(dx, dy)
+                    if self.contains(loc) and self.is_free(loc):
+                        moves.append((self.index(loc), dx, dy))
+            self._moves.append(moves)
+
     @property
     def height(self) -> int:
         return len(self.data)
@@ -38,14 +70,16 @@ class Maze:
     def width(self) -> int:
         return len(self.data[0])
 
+    def index(self, location: Location) -> int:
+        return location.y * self.width + location.x
+
+    def moves(self, cell: int) -> List[Tuple[int, int, int]]:
+        # pre-computed free neighbors of a cell as (cell, dx, dy) tuples
+        return self._moves[cell]
+
     def neighbors(self, location: Location) -> List[Location]:
         assert self.is_free(location)
-        neighbors = []
-        for dx, dy in [(1, 0), (0, 1), (-1, 0), (0, -1)]:
-            loc = location.add(dx, dy)
-            if self.contains(loc) and self.is_free(loc):
-                neighbors.append(loc)
-        return neighbors
+        return [self.locations[cell] for cell, _, _ in self._moves[self.index(location)]]
 
     def contains(self, location: Location) -> bool:
         return 0 <= location.x < self.width and 0 <= location.y < self.height
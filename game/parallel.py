@@ -0,0 +1,86 @@
+import multiprocessing
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from game.context import GameContext
+from game.enums import HistoryType
+from game.history import History
+from game.maze import Maze
+from game.transposition import TranspositionTable
+from game.tree import CompiledTree, compile_tree
+
+# subtree compiled by a worker and exported keys of its infosets, indexed by local infoset index - 1
+_Subtree = Tuple[CompiledTree, List[Tuple[int, ...]]]
+
+
+def compile_tree_parallel(root: History,
+                          processes: Optional[int] = None,
+                          transposition_size: int = 1_000_000) -> CompiledTree:
+    # compile the tree of a game starting with the initial bandit allocation: the subtrees
+    # of different allocations are independent, so they are compiled by a pool of processes.
+    # infosets are indexed in the same way as by compile_tree.
+    assert root.type() == HistoryType.decision and not root.history, "Root of the game is expected"
+
+    root_infoset = root.infoset().index()
+    actions = root.actions()
+    tasks = [(root.maze, root.num_bandits, root.hit_chance, i, transposition_size) for i in range(len(actions))]
+
+    with multiprocessing.Pool(processes) as pool:
+        subtrees = pool.map(_compile_subtree, tasks, chunksize=1)
+
+    return _merge(root, root_infoset, [str(a) for a in actions], subtrees)
+
+
+def _compile_subtree(task: Tuple[Maze, int, float, int, int]) -> _Subtree:
+    maze, num_bandits, hit_chance, action_idx, transposition_size = task
+
+    # every task is compiled with a fresh context, indexes are mapped to the global ones when merged
+    context = GameContext(maze, num_bandits, hit_chance)
+    root = History(context)
+    subtree_root = root.child(root.actions()[action_idx])
+    tree = compile_tree(subtree_root, TranspositionTable(transposition_size))
+    return tree, [context.infosets.export_key(key) for key in context.infosets.keys()]
+
+
+def _merge(root: History, root_infoset: int, root_labels: List[str], subtrees: List[_Subtree]) -> CompiledTree:
+    labels = {"": 0}
+    node_type, parent, player, infoset, action, chance_prob, utility, depth, label = \
+        [root.type()], [-1], [root.current_player()], [root_infoset], [-1], [1.], [0.], [0], [0]
+
+    # subtrees are concatenated one after another and reordered level by level afterwards
+    infosets = root.context.infosets
+    offset = 1
+    for i, (tree, keys) in enumerate(subtrees):
+        # map local infoset indexes and labels to the global ones in the order of their first
+        # occurrence, which is the order within a subtree
+        labels.setdefault(root_labels[i], len(labels))
+        global_index = np.array([-1] + [infosets.index(infosets.import_key(key)) for key in keys],
+                                dtype=np.int32)
+        label_index = np.array([labels.setdefault(name, len(labels)) for name in tree.labels], dtype=np.int32)
+
+        subtree_parent = tree.parent + offset
+        subtree_parent[0] = 0
+        subtree_action = tree.action.copy()
+        subtree_action[0] = i
+        subtree_label = label_index[tree.label]
+        subtree_label[0] = labels[root_labels[i]]
+
+        node_type.append(tree.node_type)
+        parent.append(subtree_parent)
+        player.append(tree.player)
+        infoset.append(np.where(tree.infoset >= 0, global_index[tree.infoset], -1))
+        action.append(subtree_action)
+        chance_prob.append(tree.chance_prob)
+        utility.append(tree.utility)
+        depth.append(tree.depth + 1)
+        label.append(subtree_label)
+        offset += tree.size
+
+    def concat(column: list, dtype) -> np.ndarray:
+        return np.concatenate([np.asarray(column[0:1], dtype=dtype)] + [np.asarray(c, dtype=dtype) for c in column[1:]])
+
+    return CompiledTree.from_depth_first(
+        concat(node_type, np.int8), concat(parent, np.int64), concat(player, np.int8), concat(infoset, np.int32),
+        concat(action, np.int32), concat(chance_prob, np.float64), concat(utility, np.float64),
+        concat(depth, np.int32), concat(label, np.int32), list(labels))
@@ -0,0 +1,44 @@
+from typing import Any, Iterator, List, Optional
+
+
+class Path:
+    # immutable singly linked list: extending a path creates a single new link
+    # that points to the original one, so all extensions share their common prefix.
+    __slots__ = ("last", "prefix", "_len")
+
+    last: Any
+    prefix: Optional['Path']
+
+    def __init__(self, last: Any = None, prefix: Optional['Path'] = None):
+        self.last = last
+        self.prefix = prefix
+        self._len = len(prefix) + 1 if prefix is not None else 0
+
+    def append(self, item: Any) -> 'Path':
+        return Path(item, self)
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __bool__(self) -> bool:
+        return self._len > 0
+
+    def __contains__(self, item: Any) -> bool:
+        path = self
+        while path._len:
+            if path.last == item:
+                return True
+            path = path.prefix
+        return False
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.to_list())
+
+    def to_list(self) -> List[Any]:
+        items = []
+        path = self
+        while path._len:
+            items.append(path.last)
+            path = path.prefix
+        items.reverse()
+        return items
@@ -0,0 +1,129 @@
+from typing import Dict, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+
+from game import stats
+from game.backends import Solution
+from game.enums import Player
+from game.exploitability import expected_payoff
+from game.sequence_form import SequenceForm, Sequences
+
+
+class Presolve:
+    # reduction of the sequence-form LP of a player before it is passed to a solver.
+    #
+    # 1. subtrees of sequences which reach only zero payoffs don't matter: the r-variables below
+    #    them don't appear in the objective, and the values of the opponent's infosets below them
+    #    are 0, so the infosets extending such sequences are dropped for both players.
+    # 2. a sequence of an infoset with a single action is merged into its parent sequence: their
+    #    r-variables are equal, and the v-variable of such opponent's infoset is eliminated by
+    #    adding its constraint to the constraint of the parent sequence.
+    # 3. identical v-constraints are merged.
+    #
+    # both reductions 1 and 2 are a multiplication by an aggregation matrix P (reduced x full
+    # sequences), i.e. E' = E P^T, F' = F P^T and A' = P A P^T without the rows of removed infosets.
+    # chance nodes need no reduction, they are folded into the payoff coefficients by SequenceForm.
+
+    sequence_form: SequenceForm
+    player: Player
+
+    # the reduced LP, see SequenceForm.lp
+    E: sp.csr_matrix
+    e: np.ndarray
+    F: sp.csr_matrix
+    f: np.ndarray
+    A: sp.csr_matrix
+
+    # aggregation of the player's sequences and the player's dropped sequences
+    _aggregation: sp.csr_matrix
+    _dropped: np.ndarray
+
+    def __init__(self, sequence_form: SequenceForm, player: Player):
+        self.sequence_form = sequence_form
+        self.player = player
+
+        E, e, F, f, A = sequence_form.lp(player)
+        nonzero = abs(A)
+        P, rows, self._dropped = self._reduce(sequence_form.sequences[player],
+                                              np.asarray(nonzero.sum(axis=1)).ravel() == 0)
+        Q, opponent_rows, _ = self._reduce(sequence_form.sequences[1 - player],
+                                           np.asarray(nonzero.sum(axis=0)).ravel() == 0)
+        self._aggregation = P
+
+        self.E, self.e = (E @ P.T).tocsr()[rows], e[rows]
+        self.F, self.f = (F @ Q.T).tocsr()[opponent_rows], f[opponent_rows]
+        self.A = (P @ A @ Q.T).tocsr()
+
+        # v-constraints are given by the columns of F and A
+        unique = self._unique_columns(sp.vstack([self.F, self.A]).tocsc())
+        self.F = self.F[:, unique].tocsr()
+        self.A = self.A[:, unique].tocsr()
+
+        stats.count("presolve_removed_variables", E.shape[1] + F.shape[0] - self.E.shape[1] - self.F.shape[0])
+        stats.count("presolve_removed_constraints", E.shape[0] + F.shape[1] - self.E.shape[0] - self.F.shape[1])
+
+    def lp(self) -> Tuple[sp.csr_matrix, np.ndarray, sp.csr_matrix, np.ndarray, sp.csr_matrix]:
+        return self.E, self.e, self.F, self.f, self.A
+
+    def expand(self, solution: Solution) -> Solution:
+        # solution of the full LP from a solution of the reduced one: the dropped infosets are
+        # played uniformly and the values of the opponent's infosets are computed for the
+        # realization plan, so that they satisfy the full constraints
+        sequences = self.sequence_form.sequences[self.player]
+        realization = self._aggregation.T @ solution.realization
+        behavior = sequences.behavior(realization)
+        behavior[self._dropped] = sequences.uniform()[self._dropped]
+        realization = sequences.realization(behavior)
+
+        opponent = self.sequence_form.sequences[1 - self.player]
+        payoff = expected_payoff(self.sequence_form, Player(1 - self.player), realization)
+        values = -opponent.values(payoff)[1]
+        return Solution(solution.value, realization, values)
+
+    @staticmethod
+    def _reduce(sequences: Sequences, zero: np.ndarray) -> Tuple[sp.csr_matrix, np.ndarray, np.ndarray]:
+        # aggregation matrix of sequences, kept rows and dropped sequences of a player,
+        # zero marks the sequences without any payoff
+        infoset = sequences.sequence_infoset
+        parent = sequences.infoset_parent
+
+        # sequences reaching only zero payoffs, from the deepest rows
+        null = zero.copy()
+        for rows, seqs in reversed(sequences.levels):
+            live = np.bincount(infoset[seqs], weights=~null[seqs], minlength=sequences.num_infosets)[rows] > 0
+            null[parent[rows[live]]] = False
+
+        dropped_rows = np.zeros(sequences.num_infosets, dtype=bool)
+        dropped_rows[1:] = null[parent[1:]]
+        single = sequences.num_actions == 1
+        single[0] = False
+
+        # representative of every sequence, -1 for the dropped ones
+        representative = np.arange(sequences.num_sequences)
+        for rows, seqs in sequences.levels:
+            merged = single[infoset[seqs]]
+            representative[seqs] = np.where(merged, representative[parent[infoset[seqs]]], seqs)
+            representative[seqs[dropped_rows[infoset[seqs]]]] = -1
+
+        kept = representative >= 0
+        reduced = np.cumsum(representative == np.arange(sequences.num_sequences)) - 1
+        P = sp.csr_matrix((np.ones(kept.sum()), (reduced[representative[kept]], np.flatnonzero(kept))),
+                          shape=(reduced[-1] + 1 if len(reduced) else 0, sequences.num_sequences))
+        rows = np.flatnonzero(~dropped_rows & ~single)
+        return P, rows, ~kept
+
+    @staticmethod
+    def _unique_columns(M: sp.csc_matrix) -> np.ndarray:
+        # indexes of the first occurrences of identical columns
+        M.eliminate_zeros()
+        M.sort_indices()
+        first: Dict[Tuple[bytes, bytes], int] = {}
+        unique = []
+        for j in range(M.shape[1]):
+            start, end = M.indptr[j], M.indptr[j + 1]
+            key = M.indices[start:end].tobytes(), M.data[start:end].tobytes()
+            if key not in first:
+                first[key] = j
+                unique.append(j)
+        return np.array(unique, dtype=np.int64)
@@ -0,0 +1,204 @@
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+
+from game.enums import Player, HistoryType
+from game.tree import CompiledTree
+
+
+class Sequences:
+    # sequence-form structure of a single player.
+    #
+    # sequences are indexed by integers, 0 is the empty sequence. sequences extending
+    # the same infoset occupy a contiguous range of indexes, ordered as the actions.
+    # infosets are indexed by rows, row 0 is a dummy infoset of the empty sequence.
+
+    player: Player
+
+    infosets: np.ndarray        # Infoset index of every row, -1 for row 0
+    infoset_parent: np.ndarray  # sequence leading to every row, -1 for row 0
+    infoset_start: np.ndarray   # first sequence extending every row
+    num_actions: np.ndarray     # number of sequences extending every row
+
+    infoset_depth: np.ndarray   # number of player's actions leading to every row
+
+    sequence_infoset: np.ndarray  # row extended by every sequence
+    node_sequence: np.ndarray     # sequence of the player leading to every node of the tree
+    node_infoset: np.ndarray      # row of every player's node of the tree, 0 for other nodes
+
+    # arrays stored by arrays() and restored by from_arrays()
+    ARRAYS = ("infosets", "infoset_parent", "infoset_start", "num_actions", "infoset_depth",
+              "sequence_infoset", "node_sequence", "node_infoset")
+
+    def __init__(self, tree: CompiledTree, player: Player):
+        self.player = player
+
+        is_player = (tree.node_type == HistoryType.decision) & (tree.player == player)
+        nodes = np.flatnonzero(is_player)
+        infosets, first, inverse = np.unique(tree.infoset[nodes], return_index=True, return_inverse=True)
+        representatives = nodes[first]
+
+        self.node_infoset = np.zeros(tree.size, dtype=np.int32)
+        self.node_infoset[nodes] = inverse + 1
+
+        self.infosets = np.concatenate([[-1], infosets]).astype(np.int32)
+        self.num_actions = np.concatenate([[1], tree.num_children[representatives]]).astype(np.int32)
+        self.infoset_start = np.concatenate([[0], np.cumsum(self.num_actions)[:-1]]).astype(np.int32)
+        self.sequence_infoset = np.repeat(np.arange(self.num_infosets, dtype=np.int32), self.num_actions)
+
+        # parents precede their children, so sequences can be propagated level by level
+        self.node_sequence = np.zeros(tree.size, dtype=np.int32)
+        node_depth = np.zeros(tree.size, dtype=np.int32)
+        for depth in range(1, tree.num_levels):
+            level = tree.level(depth)
+            parent = tree.parent[level]
+            extended = self.infoset_start[self.node_infoset[parent]] + tree.action[level]
+            self.node_sequence[level] = np.where(is_player[parent], extended, self.node_sequence[parent])
+            node_depth[level] = node_depth[parent] + is_player[parent]
+
+        self.infoset_parent = np.concatenate([[-1], self.node_sequence[representatives]]).astype(np.int32)
+        self.infoset_depth = np.concatenate([[0], node_depth[representatives] + 1]).astype(np.int32)
+        self._group_levels()
+
+    @classmethod
+    def from_arrays(cls, player: Player, arrays: Dict[str, np.ndarray]) -> 'Sequences':
+        sequences = cls.__new__(cls)
+        sequences.player = player
+        for name in cls.ARRAYS:
+            setattr(sequences, name, arrays[name])
+        sequences._group_levels()
+        return sequences
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {name: getattr(self, name) for name in self.ARRAYS}
+
+    def _group_levels(self):
+        # rows and their sequences grouped by depth, used by the level by level passes
+        rows = np.split(np.argsort(self.infoset_depth, kind="stable"),
+                        np.cumsum(np.bincount(self.infoset_depth))[:-1])
+        sequence_depth = self.infoset_depth[self.sequence_infoset]
+        seqs = np.split(np.argsort(sequence_depth, kind="stable"),
+                        np.cumsum(np.bincount(sequence_depth))[:-1])
+        self._levels: List[Tuple[np.ndarray, np.ndarray]] = list(zip(rows[1:], seqs[1:]))
+
+    @property
+    def num_sequences(self) -> int:
+        return len(self.sequence_infoset)
+
+    @property
+    def num_infosets(self) -> int:
+        return len(self.infosets)
+
+    @property
+    def levels(self) -> List[Tuple[np.ndarray, np.ndarray]]:
+        # rows of depth 1, 2, ... and the sequences extending them
+        return self._levels
+
+    def constraints(self) -> Tuple[sp.csr_matrix, np.ndarray]:
+        # realization plan constraints E r = e:
+        # r(empty) = 1 and r(seq(I)) = sum_a r(seq(I)a) for every infoset I.
+        rows = np.concatenate([self.sequence_infoset, np.arange(1, self.num_infosets)])
+        cols = np.concatenate([np.arange(self.num_sequences), self.infoset_parent[1:]])
+        vals = np.concatenate([np.ones(self.num_sequences), -np.ones(self.num_infosets - 1)])
+        E = sp.csr_matrix((vals, (rows, cols)), shape=(self.num_infosets, self.num_sequences))
+
+        e = np.zeros(self.num_infosets)
+        e[0] = 1.
+        return E, e
+
+    def uniform(self) -> np.ndarray:
+        # behavioral strategy choosing every action with the same probability
+        return 1. / self.num_actions[self.sequence_infoset]
+
+    def realization(self, behavior: np.ndarray) -> np.ndarray:
+        # realization plan of a behavioral strategy given by the probabilities of every sequence's last action
+        realization = np.ones(self.num_sequences)
+        for _, seqs in self._levels:
+            realization[seqs] = realization[self.infoset_parent[self.sequence_infoset[seqs]]] * behavior[seqs]
+        return realization
+
+    def behavior(self, realization: np.ndarray) -> np.ndarray:
+        # behavioral strategy of a realization plan, uniform in the unreachable infosets
+        parent = realization[self.infoset_parent[self.sequence_infoset]]
+        parent[0] = 1.
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(parent > 0, realization / parent, self.uniform())
+
+    def values(self, payoff: np.ndarray, behavior: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        # counterfactual values of the player's sequences and infosets, given the expected payoff
+        # of every sequence against the opponent's realization plan (e.g. A y).
+        # if no behavioral strategy is given, the player best responds in every infoset.
+        # return values of the sequences and the values of the rows, the value of row 0 is
+        # the expected utility of the player in the root.
+        sequence_values = np.array(payoff, dtype=np.float64)
+        infoset_values = np.zeros(self.num_infosets)
+        for rows, seqs in reversed(self._levels):
+            if behavior is None:
+                row_values = np.full(self.num_infosets, -np.inf)
+                np.maximum.at(row_values, self.sequence_infoset[seqs], sequence_values[seqs])
+            else:
+                row_values = np.bincount(self.sequence_infoset[seqs],
+                                         weights=behavior[seqs] * sequence_values[seqs],
+                                         minlength=self.num_infosets)
+            infoset_values[rows] = row_values[rows]
+            np.add.at(sequence_values, self.infoset_parent[rows], infoset_values[rows])
+        infoset_values[0] = sequence_values[0]
+        return sequence_values, infoset_values
+
+    def best_response(self, payoff: np.ndarray) -> float:
+        # expected utility of the player's best response against the opponent's realization plan
+        return self.values(payoff)[1][0]
+
+
+class SequenceForm:
+    # sequence form of a two player zero-sum game, shared by both players.
+
+    tree: CompiledTree
+    sequences: Tuple[Sequences, Sequences]
+
+    # expected utility of the first player for every pair of players' sequences,
+    # including the probabilities of chance actions
+    payoff: sp.csr_matrix
+
+    def __init__(self, tree: CompiledTree):
+        self.tree = tree
+        self.sequences = (Sequences(tree, Player(0)), Sequences(tree, Player(1)))
+
+        terminals = np.flatnonzero(tree.node_type == HistoryType.terminal)
+        self.payoff = sp.csr_matrix(
+            ((tree.reach() * tree.utility)[terminals],
+             (self.sequences[0].node_sequence[terminals], self.sequences[1].node_sequence[terminals])),
+            shape=(self.sequences[0].num_sequences, self.sequences[1].num_sequences))
+
+    @classmethod
+    def from_parts(cls,
+                   tree: CompiledTree,
+                   sequences: Tuple[Sequences, Sequences],
+                   payoff: sp.csr_matrix) -> 'SequenceForm':
+        sequence_form = cls.__new__(cls)
+        sequence_form.tree = tree
+        sequence_form.sequences = sequences
+        sequence_form.payoff = payoff
+        return sequence_form
+
+    def lp(self, player: Player) -> Tuple[sp.csr_matrix, np.ndarray, sp.csr_matrix, np.ndarray, sp.csr_matrix]:
+        # matrices of the LP of a given player:
+        #
+        #   max f^T v
+        #   s.t. E r = e
+        #        F^T v - A^T r <= 0
+        #        r >= 0
+        #
+        # where E, e are constraints of the player's realization plan r, F, f are constraints
+        # of the opponent's realization plan and A is the payoff matrix of the player.
+        # v are the values of the opponent's infosets.
+        E, e = self.sequences[player].constraints()
+        F, f = self.sequences[1 - player].constraints()
+        return E, e, F, f, self.player_payoff(player)
+
+    def player_payoff(self, player: Player, payoff: Optional[sp.csr_matrix] = None) -> sp.csr_matrix:
+        # payoff matrix of a given player, rows are the player's sequences.
+        # another payoff matrix of the first player with the same structure can be given.
+        payoff = self.payoff if payoff is None else payoff
+        return payoff if player == 0 else -payoff.T.tocsr()
@@ -0,0 +1,157 @@
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, Optional, Tuple, TypeVar
+
+import numpy as np
+
+from game.enums import HistoryType
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+T = TypeVar("T")
+
+
+class Stats:
+    # wall and CPU time spent in the phases of a run, counters of its sizes and peak memory.
+    # CPU time includes finished child processes, e.g. the workers compiling the tree,
+    # and all threads of the process.
+
+    phases: Dict[str, Dict[str, float]]
+    counters: Dict[str, int]
+
+    def __init__(self):
+        self.phases = {}
+        self.counters = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        wall, cpu = time.perf_counter(), self._cpu_time()
+        try:
+            yield
+        finally:
+            # a phase entered repeatedly accumulates its times
+            entry = self.phases.setdefault(name, {"wall": 0., "cpu": 0.})
+            entry["wall"] += time.perf_counter() - wall
+            entry["cpu"] += self._cpu_time() - cpu
+
+    def count(self, name: str, value: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + int(value)
+
+    def merge(self, other: 'Stats'):
+        # add the phases and counters of other Stats, e.g. recorded by another thread
+        for name, entry in other.phases.items():
+            merged = self.phases.setdefault(name, {"wall": 0., "cpu": 0.})
+            merged["wall"] += entry["wall"]
+            merged["cpu"] += entry["cpu"]
+        for name, value in other.counters.items():
+            self.count(name, value)
+
+    @staticmethod
+    def peak_memory() -> Optional[int]:
+        # peak resident set size in bytes of this process or any of its children
+        if resource is None:
+            return None
+        peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                   resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+        return peak if sys.platform == "darwin" else peak * 1024
+
+    def report(self) -> Dict:
+        return {"phases": self.phases, "counters": self.counters, "peak_memory": self.peak_memory()}
+
+    def write(self, path: Optional[str] = None):
+        # readable summary to stderr, or the report as JSON to a file
+        if path is not None:
+            with open(path, "w") as f:
+                json.dump(self.report(), f, indent=2)
+            return
+
+        for name, entry in self.phases.items():
+            print(f"{name:<24} wall {entry['wall']:10.4f}s  cpu {entry['cpu']:10.4f}s", file=sys.stderr)
+        for name, value in self.counters.items():
+            print(f"{name:<24} {value}", file=sys.stderr)
+        peak = self.peak_memory()
+        if peak is not None:
+            print(f"{'peak_memory':<24} {peak / (1 << 20):.1f} MB", file=sys.stderr)
+
+    @staticmethod
+    def _cpu_time() -> float:
+        children = os.times()
+        return time.process_time() + children.children_user + children.children_system
+
+
+# statistics of the current run, nothing is recorded unless enabled. they are local to the
+# context, so threads (which start with an empty context) don't record into the same Stats.
+_stats: ContextVar[Optional[Stats]] = ContextVar("stats", default=None)
+
+
+def enable() -> Stats:
+    stats = Stats()
+    _stats.set(stats)
+    return stats
+
+
+def disable():
+    _stats.set(None)
+
+
+def current() -> Optional[Stats]:
+    return _stats.get()
+
+
+def isolated(function: Callable[[], T], enabled: bool = True) -> Tuple[T, Optional[Stats]]:
+    # call a function recording into its own Stats, e.g. in a worker thread, and return its result
+    # and the Stats, which the caller may merge into its own ones
+    token = _stats.set(Stats() if enabled else None)
+    try:
+        return function(), _stats.get()
+    finally:
+        _stats.reset(token)
+
+
+def phase(name: str):
+    stats = _stats.get()
+    return stats.phase(name) if stats is not None else nullcontext()
+
+
+def count(name: str, value: int = 1):
+    stats = _stats.get()
+    if stats is not None:
+        stats.count(name, value)
+
+
+def record_tree(tree):
+    # node counts by type and infoset counts by player of a CompiledTree
+    stats = _stats.get()
+    if stats is None:
+        return
+    node_counts = np.bincount(tree.node_type, minlength=len(HistoryType) + 1)
+    for history_type in HistoryType:
+        stats.count(f"nodes_{history_type.name}", node_counts[history_type])
+    decision = tree.node_type == HistoryType.decision
+    for player in range(2):
+        stats.count(f"infosets_{player}", len(np.unique(tree.infoset[decision & (tree.player == player)])))
+
+
+def record_sequence_form(sequence_form):
+    stats = _stats.get()
+    if stats is None:
+        return
+    for player, sequences in enumerate(sequence_form.sequences):
+        stats.count(f"sequences_{player}", sequences.num_sequences)
+
+
+def record_lp(E, e, F, f, A):
+    # size of the LP over x = [r, v], see Backend.standard_form
+    stats = _stats.get()
+    if stats is None:
+        return
+    stats.count("lp_variables", E.shape[1] + F.shape[0])
+    stats.count("lp_constraints", E.shape[0] + F.shape[1])
+    stats.count("lp_nonzeros", E.nnz + F.nnz + A.nnz)
@@ -0,0 +1,109 @@
+from typing import Iterable, List, Optional, Union
+
+import numpy as np
+import scipy.sparse as sp
+
+from game.actions import Chance
+from game.backends import Backend, Model, Solution, get_backend
+from game.enums import Player, HistoryType
+from game.sequence_form import SequenceForm
+from game.tree import CompiledTree
+
+
+class HitChanceSweep:
+    # sequence-form LP of a player re-solved for different hit chances.
+    #
+    # the hit chance only changes the probabilities of chance actions, so the tree, the sequences
+    # and the constraints stay the same and the LP is built once. the payoff of a terminal node
+    # is u * p * h^hits * (1 - h)^misses, where hits and misses are counted along its path, so only
+    # the coefficients of sequences leading through chance nodes are updated. p is the product of
+    # the probabilities of other chance actions on the path, which don't depend on the hit chance.
+
+    sequence_form: SequenceForm
+    player: Player
+    backend: Backend
+
+    # the LP, built by the first solve
+    model: Optional[Model]
+
+    # structure of the payoff matrix of the first player and the entry of every terminal node
+    _indices: np.ndarray
+    _indptr: np.ndarray
+    _entry: np.ndarray
+
+    # utility times the fixed chance probability, number of hits and number of misses
+    # on the path of every terminal node
+    _utility: np.ndarray
+    _hits: np.ndarray
+    _misses: np.ndarray
+
+    def __init__(self, sequence_form: SequenceForm, player: Player, backend: Union[str, Backend] = "gurobi"):
+        self.sequence_form = sequence_form
+        self.player = player
+        tree = sequence_form.tree
+
+        hit_label = self._label(tree, str(Chance(Chance.HIT)))
+        hit_nodes = self.hit_nodes(tree)
+        hits = np.zeros(tree.size, dtype=np.int32)
+        misses = np.zeros(tree.size, dtype=np.int32)
+        fixed = np.ones(tree.size)
+        for depth in range(1, tree.num_levels):
+            level = tree.level(depth)
+            parent = tree.parent[level]
+            is_chance = hit_nodes[parent]
+            is_hit = is_chance & (tree.label[level] == hit_label)
+            hits[level] = hits[parent] + is_hit
+            misses[level] = misses[parent] + (is_chance & ~is_hit)
+            fixed[level] = fixed[parent] * np.where(is_chance, 1., tree.chance_prob[level])
+
+        terminals = np.flatnonzero(tree.node_type == HistoryType.terminal)
+        self._utility = tree.utility[terminals] * fixed[terminals]
+        self._hits = hits[terminals]
+        self._misses = misses[terminals]
+
+        # entries are kept even if they are zero for some hit chances, so that the structure is fixed
+        rows = sequence_form.sequences[0].node_sequence[terminals].astype(np.int64)
+        cols = sequence_form.sequences[1].node_sequence[terminals].astype(np.int64)
+        num_cols = sequence_form.sequences[1].num_sequences
+        entries, self._entry = np.unique(rows * num_cols + cols, return_inverse=True)
+        self._indices = (entries % num_cols).astype(np.int32)
+        self._indptr = np.searchsorted(entries // num_cols, np.arange(sequence_form.sequences[0].num_sequences + 1))
+
+        self.backend = get_backend(backend) if isinstance(backend, str) else backend
+        self.model = None
+
+    @staticmethod
+    def hit_nodes(tree: CompiledTree) -> np.ndarray:
+        # chance nodes whose actions are a hit and a miss, their probabilities are swept
+        hit_label = HitChanceSweep._label(tree, str(Chance(Chance.HIT)))
+        miss_label = HitChanceSweep._label(tree, str(Chance(Chance.MISS)))
+        parent, label = tree.parent[1:], tree.label[1:]
+        num_hits = np.bincount(parent, weights=label == hit_label, minlength=tree.size)
+        num_misses = np.bincount(parent, weights=label == miss_label, minlength=tree.size)
+        return ((tree.node_type == HistoryType.chance) & (tree.num_children == 2)
+                & (num_hits == 1) & (num_misses == 1))
+
+    @staticmethod
+    def _label(tree: CompiledTree, name: str) -> int:
+        return tree.labels.index(name) if name in tree.labels else -1
+
+    def payoff(self, hit_chance: float) -> sp.csr_matrix:
+        # payoff matrix of the first player for a given hit chance
+        assert 0 <= hit_chance <= 1
+        reach = hit_chance ** self._hits * (1 - hit_chance) ** self._misses
+        data = np.bincount(self._entry, weights=self._utility * reach, minlength=len(self._indices))
+        return sp.csr_matrix((data, self._indices, self._indptr),
+                             shape=(self.sequence_form.sequences[0].num_sequences,
+                                    self.sequence_form.sequences[1].num_sequences))
+
+    def solve(self, hit_chance: float) -> Solution:
+        payoff = self.sequence_form.player_payoff(self.player, self.payoff(hit_chance))
+        if self.model is None:
+            E, e, F, f, _ = self.sequence_form.lp(self.player)
+            self.model = self.backend.model(E, e, F, f, payoff)
+        else:
+            self.model.set_payoff(payoff)
+        return self.model.solve()
+
+    def sweep(self, hit_chances: Iterable[float]) -> List[Solution]:
+        return [self.solve(hit_chance) for hit_chance in hit_chances]
@@ -0,0 +1,52 @@
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+
+class TranspositionTable:
+    # LRU cache of values computed for canonical game states.
+    # every value has a size (e.g. a number of actions or tree nodes) and the least recently
+    # used values are evicted once the total size of the stored values exceeds max_size.
+
+    max_size: int
+    size: int
+
+    hits: int
+    misses: int
+
+    def __init__(self, max_size: int = 1_000_000):
+        assert max_size > 0
+        self.max_size = max_size
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[Hashable, Tuple[Any, int]]' = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key: Hashable, value: Any, size: int = 1):
+        if size > self.max_size:
+            return
+        if key in self._entries:
+            self.size -= self._entries.pop(key)[1]
+        self._entries[key] = (value, size)
+        self.size += size
+        while self.size > self.max_size:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.size -= evicted_size
+
+    def clear(self):
+        self._entries.clear()
+        self.size = 0
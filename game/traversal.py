@@ -0,0 +1,72 @@
+from typing import List, NamedTuple, Optional
+
+from game.actions import Action
+from game.enums import HistoryType
+from game.history import History
+
+
+class PathState(NamedTuple):
+    depth: int
+    action: int          # index of the action leading to the node in the parent's actions list, -1 for the root
+    action_prob: float   # probability of the action leading to the node if played by chance, 1 otherwise
+
+
+ROOT_STATE = PathState(depth=0, action=-1, action_prob=1.)
+
+
+class Visitor:
+    # hooks called by traverse, both do nothing by default
+
+    def enter(self, history: History, action: Optional[Action], state: PathState) -> bool:
+        # called before the children of a node are visited, action is None for the root.
+        # return False to skip the subtree of the node.
+        return True
+
+    def leave(self, history: History, state: PathState):
+        # called after all children of a node are visited
+        pass
+
+
+class _Frame:
+    history: History
+    state: PathState
+    actions: List[Action]
+    next_action: int
+    chance: bool
+
+    def __init__(self, history: History, state: PathState):
+        self.history = history
+        self.state = state
+        self.actions = history.actions()
+        self.next_action = 0
+        self.chance = history.type() == HistoryType.chance
+
+
+def traverse(root: History, visitor: Visitor):
+    # depth-first traversal of the tree using an explicit stack instead of recursion,
+    # so that the depth of the tree is not limited by the interpreter's recursion limit.
+    if not visitor.enter(root, None, ROOT_STATE) or root.type() == HistoryType.terminal:
+        visitor.leave(root, ROOT_STATE)
+        return
+
+    stack = [_Frame(root, ROOT_STATE)]
+    while stack:
+        frame = stack[-1]
+        if frame.next_action == len(frame.actions):
+            stack.pop()
+            visitor.leave(frame.history, frame.state)
+            continue
+
+        i = frame.next_action
+        frame.next_action += 1
+
+        history, state = frame.history, frame.state
+        action = frame.actions[i]
+        prob = history.chance_prob(action) if frame.chance else 1.
+        child_state = PathState(state.depth + 1, i, prob)
+
+        child = history.child(action)
+        if not visitor.enter(child, action, child_state) or child.type() == HistoryType.terminal:
+            visitor.leave(child, child_state)
+        else:
+            stack.append(_Frame(child, child_state))
@@ -0,0 +1,245 @@
+from typing import Dict, Hashable, List, NamedTuple, Optional
+
+import numpy as np
+
+from game.actions import Action
+from game.enums import HistoryType
+from game.history import History
+from game.transposition import TranspositionTable
+from game.traversal import PathState, Visitor, traverse
+
+
+class CompiledTree:
+    # struct-of-arrays representation of a fully expanded game tree.
+    #
+    # nodes are stored level by level (breadth-first), so that:
+    # 1. parent[i] < i for every non-root node i,
+    # 2. children of a node occupy a contiguous range of indexes,
+    # 3. nodes of the same depth occupy a contiguous range of indexes.
+
+    node_type: np.ndarray    # HistoryType of a node
+    parent: np.ndarray       # index of a parent node, -1 for the root
+    player: np.ndarray       # Player acting in a node
+    infoset: np.ndarray      # Infoset index of a decision node, -1 otherwise
+    action: np.ndarray       # index of an action leading to a node in parent's actions list
+    chance_prob: np.ndarray  # probability of an action leading to a node, 1 if parent isn't a chance node
+    utility: np.ndarray      # utility of the first player in a terminal node, 0 otherwise
+    label: np.ndarray        # index of an action leading to a node in the labels list
+
+    # names of the actions
+    labels: List[str]
+
+    # derived arrays
+    num_children: np.ndarray  # number of children of a node
+    first_child: np.ndarray   # index of the first child of a node
+    depth: np.ndarray         # depth of a node, 0 for the root
+    level_bounds: np.ndarray  # nodes of depth d occupy indexes level_bounds[d]:level_bounds[d + 1]
+
+    # arrays stored by arrays() and restored by from_arrays()
+    ARRAYS = ("node_type", "parent", "player", "infoset", "action", "chance_prob", "utility", "label",
+              "num_children", "first_child", "depth", "level_bounds")
+
+    def __init__(self,
+                 node_type: np.ndarray,
+                 parent: np.ndarray,
+                 player: np.ndarray,
+                 infoset: np.ndarray,
+                 action: np.ndarray,
+                 chance_prob: np.ndarray,
+                 utility: np.ndarray,
+                 label: np.ndarray,
+                 labels: List[str]):
+        self.node_type = node_type
+        self.parent = parent
+        self.player = player
+        self.infoset = infoset
+        self.action = action
+        self.chance_prob = chance_prob
+        self.utility = utility
+        self.label = label
+        self.labels = labels
+
+        self.num_children = np.bincount(parent[1:], minlength=self.size).astype(np.int32)
+        self.first_child = np.searchsorted(parent[1:], np.arange(self.size)).astype(np.int32) + 1
+
+        self.depth = np.zeros(self.size, dtype=np.int32)
+        start, end = 0, 1
+        while start < end:
+            children_end = self.first_child[end - 1] + self.num_children[end - 1]
+            self.depth[end:children_end] = self.depth[start] + 1
+            start, end = end, children_end
+        self.level_bounds = np.flatnonzero(np.diff(self.depth, prepend=-1, append=-1))
+
+    @classmethod
+    def from_depth_first(cls,
+                         node_type, parent, player, infoset, action, chance_prob, utility, depth, label,
+                         labels: List[str]) -> 'CompiledTree':
+        # tree from the columns of its nodes in a depth-first order, given as array-likes
+        # (lists, arrays or numpy arrays). the nodes are reordered level by level,
+        # children of a node remain contiguous.
+        order = np.argsort(np.asarray(depth, dtype=np.int32), kind="stable")
+        position = np.empty_like(order)
+        position[order] = np.arange(len(order))
+        parent = np.asarray(parent, dtype=np.int64)[order]
+        parent[1:] = position[parent[1:]]
+
+        return cls(
+            node_type=np.asarray(node_type, dtype=np.int8)[order],
+            parent=parent.astype(np.int32),
+            player=np.asarray(player, dtype=np.int8)[order],
+            infoset=np.asarray(infoset, dtype=np.int32)[order],
+            action=np.asarray(action, dtype=np.int32)[order],
+            chance_prob=np.asarray(chance_prob, dtype=np.float64)[order],
+            utility=np.asarray(utility, dtype=np.float64)[order],
+            label=np.asarray(label, dtype=np.int32)[order],
+            labels=labels,
+        )
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], labels: List[str]) -> 'CompiledTree':
+        # restore a tree without recomputing the derived arrays, so that the arrays aren't copied
+        tree = cls.__new__(cls)
+        for name in cls.ARRAYS:
+            setattr(tree, name, arrays[name])
+        tree.labels = labels
+        return tree
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {name: getattr(self, name) for name in self.ARRAYS}
+
+    @property
+    def size(self) -> int:
+        return len(self.node_type)
+
+    @property
+    def num_levels(self) -> int:
+        return len(self.level_bounds) - 1
+
+    def level(self, depth: int) -> slice:
+        return slice(self.level_bounds[depth], self.level_bounds[depth + 1])
+
+    def children(self, node: int) -> range:
+        return range(self.first_child[node], self.first_child[node] + self.num_children[node])
+
+    def reach(self) -> np.ndarray:
+        # chance contribution to the probability of reaching every node
+        reach = np.ones(self.size)
+        for depth in range(1, self.num_levels):
+            level = self.level(depth)
+            reach[level] = reach[self.parent[level]] * self.chance_prob[level]
+        return reach
+
+
+class _Compiler(Visitor):
+    # collects the nodes in the order of a depth-first traversal, so that infosets
+    # are indexed in the same order as they are encountered by the traversal.
+
+    def __init__(self, transpositions: Optional[TranspositionTable] = None):
+        self.node_type: List[int] = []
+        self.parent: List[int] = []
+        self.player: List[int] = []
+        self.infoset: List[int] = []
+        self.action: List[int] = []
+        self.chance_prob: List[float] = []
+        self.utility: List[float] = []
+        self.depth: List[int] = []
+        self.label: List[int] = []
+        self.labels: Dict[str, int] = {}
+
+        # indexes of the nodes on the current path
+        self._path: List[int] = []
+
+        # subtrees reachable by different paths are compiled once and then copied from the table
+        self.transpositions = transpositions
+        # subtree keys of the nodes on the current path, None if their subtrees aren't cached
+        self._keys: List[Optional[Hashable]] = []
+
+    def enter(self, history: History, action: Optional[Action], state: PathState) -> bool:
+        name = str(action) if action is not None else ""
+        label = self.labels.setdefault(name, len(self.labels))
+        parent = self._path[-1] if self._path else -1
+
+        key = history.subtree_key() if self.transpositions is not None else None
+        if key is not None:
+            block = self.transpositions.get(key)
+            if block is not None:
+                self._path.append(len(self.node_type))
+                self._keys.append(None)
+                self._copy_block(block, parent, label, state)
+                return False
+
+        h_type = history.type()
+        self.node_type.append(h_type)
+        self.parent.append(parent)
+        self.player.append(history.current_player())
+        self.infoset.append(history.infoset().index() if h_type == HistoryType.decision else -1)
+        self.action.append(state.action)
+        self.chance_prob.append(state.action_prob)
+        self.utility.append(history.utility() if h_type == HistoryType.terminal else 0.)
+        self.depth.append(state.depth)
+        self.label.append(label)
+
+        self._path.append(len(self.node_type) - 1)
+        self._keys.append(key)
+        return True
+
+    def leave(self, history: History, state: PathState):
+        node = self._path.pop()
+        key = self._keys.pop()
+        if key is not None:
+            # the subtree of the node occupies all nodes collected after it
+            end = len(self.node_type)
+            block = _Block(
+                node_type=self.node_type[node:end],
+                parent=[-1] + [p - node for p in self.parent[node + 1:end]],
+                player=self.player[node:end],
+                infoset=self.infoset[node:end],
+                action=self.action[node:end],
+                chance_prob=self.chance_prob[node:end],
+                utility=self.utility[node:end],
+                depth=[d - state.depth for d in self.depth[node:end]],
+                label=self.label[node:end],
+            )
+            self.transpositions.put(key, block, end - node)
+
+    def _copy_block(self, block: '_Block', parent: int, label: int, state: PathState):
+        start = len(self.node_type)
+        self.node_type.extend(block.node_type)
+        self.parent.append(parent)
+        self.parent.extend([start + p for p in block.parent[1:]])
+        self.player.extend(block.player)
+        self.infoset.extend(block.infoset)
+        self.action.append(state.action)
+        self.action.extend(block.action[1:])
+        self.chance_prob.append(state.action_prob)
+        self.chance_prob.extend(block.chance_prob[1:])
+        self.utility.extend(block.utility)
+        self.depth.extend([state.depth + d for d in block.depth])
+        self.label.append(label)
+        self.label.extend(block.label[1:])
+
+
+class _Block(NamedTuple):
+    # nodes of a compiled subtree in the depth-first order,
+    # parents and depths are relative to the root of the subtree
+    node_type: List[int]
+    parent: List[int]
+    player: List[int]
+    infoset: List[int]
+    action: List[int]
+    chance_prob: List[float]
+    utility: List[float]
+    depth: List[int]
+    label: List[int]
+
+
+def compile_tree(root: History, transpositions: Optional[TranspositionTable] = None) -> CompiledTree:
+    # transpositions table caches subtrees reachable by different paths, so they are expanded once.
+    # it's only used for histories which provide the keys of their subtrees, see History.subtree_key
+    if not hasattr(root, "subtree_key"):
+        transpositions = None
+    compiler = _Compiler(transpositions)
+    traverse(root, compiler)
+    return CompiledTree.from_depth_first(
+        compiler.node_type, compiler.parent, compiler.player, compiler.infoset, compiler.action,
+        compiler.chance_prob, compiler.utility, compiler.depth, compiler.label, list(compiler.labels))
@@ -0,0 +1,121 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+from typing import Dict, Iterator, NamedTuple, Optional
+
+from game_lp import root_value
+from game_tree import create_root
+from game import Player, GameCache, compile_sequence_form, stats
+from game.backends import BACKENDS, Backend, get_backend
+
+
+class Job(NamedTuple):
+    id: str
+    spec: str  # game specification in the input format of game_lp.py, the player line is optional
+    player: Optional[int]
+
+
+# solver state of a worker process, shared by all of its jobs
+_backend: Optional[Backend] = None
+_cache: Optional[GameCache] = None
+
+
+def read_jobs(source: str) -> Iterator[Job]:
+    # jobs from the files of a directory, or from a JSONL stream (- is stdin) of objects
+    # with "spec" and optional "id" and "player" fields
+    if os.path.isdir(source):
+        for name in sorted(os.listdir(source)):
+            path = os.path.join(source, name)
+            if os.path.isfile(path) and not name.startswith("."):
+                with open(path) as f:
+                    yield Job(name, f.read(), None)
+        return
+
+    stream = sys.stdin if source == "-" else open(source)
+    try:
+        for i, line in enumerate(stream):
+            if line.strip():
+                job = json.loads(line)
+                yield Job(str(job.get("id", i)), job["spec"], job.get("player"))
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def solve_job(job: Job, default_player: int = 0) -> Dict:
+    # solve a job in a worker, failures are reported in the result instead of stopping the batch
+    start = time.perf_counter()
+    job_stats = stats.enable()
+    try:
+        lines = iter(job.spec.splitlines())
+        root = create_root(lines.__next__)
+        player = job.player
+        if player is None:
+            player = next((int(line) for line in lines if line.strip()), default_player)
+
+        sequence_form = compile_sequence_form(root, cache=_cache)
+        value = root_value(sequence_form, Player(player), _backend)
+        result = {"id": job.id, "player": player, "value": value}
+    except Exception as e:
+        result = {"id": job.id, "error": f"{e.__class__.__name__}: {e}", "traceback": traceback.format_exc()}
+    finally:
+        stats.disable()
+
+    result["time"] = time.perf_counter() - start
+    result["phases"] = {name: entry["wall"] for name, entry in job_stats.phases.items()}
+    result["worker"] = os.getpid()
+    return result
+
+
+def _init_worker(backend: str, cache: Optional[str], cache_size: int):
+    global _backend, _cache
+    # the solver is set up once per worker, e.g. a single Gurobi environment for all of its models
+    _backend = get_backend(backend, quiet=True) if backend == "gurobi" else get_backend(backend)
+    _cache = GameCache(cache, cache_size) if cache else None
+
+
+def _solve(task) -> Dict:
+    return solve_job(*task)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve many games and stream their values as JSON lines.")
+    parser.add_argument("source", help="directory of game specifications, or a JSONL file of jobs (- for stdin)")
+    parser.add_argument("--player", type=int, choices=(0, 1), default=0,
+                        help="player of the jobs which don't specify one")
+    parser.add_argument("--backend", choices=BACKENDS, default="gurobi", help="LP solver")
+    parser.add_argument("--processes", type=int, help="number of worker processes (default: number of CPUs)")
+    parser.add_argument("--cache", help="directory of the cache of compiled games")
+    parser.add_argument("--cache-size", type=int, default=1024, help="size limit of the cache in MB")
+    args = parser.parse_args()
+
+    init_args = (args.backend, args.cache, args.cache_size << 20)
+    tasks = ((job, args.player) for job in read_jobs(args.source))
+    failed = 0
+
+    def report(result: Dict):
+        nonlocal failed
+        failed += "error" in result
+        print(json.dumps(result), flush=True)
+
+    if args.processes == 1:
+        _init_worker(*init_args)
+        for task in tasks:
+            report(_solve(task))
+    else:
+        # results are written as soon as they are complete, not in the order of the jobs
+        with multiprocessing.Pool(args.processes, _init_worker, init_args) as pool:
+            for result in pool.imap_unordered(_solve, tasks):
+                report(result)
+
+    if failed:
+        print(f"{failed} job(s) failed", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
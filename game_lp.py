@@ -11,12 +11,19 @@
 #
 # For automatic evaluation, test version of game_tree will be imported.
 # In  your solution, submit only this file, i.e. game_lp.py
-from typing import Dict
+import argparse
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, NamedTuple, Optional, Tuple, Union
 
-import gurobipy as gp
+import numpy as np
 
 from game_tree import create_root
-from game import Player, History, HistoryType
+from game import (
+    Player, History, CompiledTree, SequenceForm, CFRPlus, GameCache, HitChanceSweep, Presolve, DoubleOracle, Bounds,
+    best_response, compile_sequence_form, evaluate, read_efg, stats
+)
+from game.backends import BACKENDS, Backend, Solution, get_backend
 
 # Following packages are supported:
 # Solvers:
@@ -47,7 +54,10 @@ from game import Player, History, HistoryType
 # At the course webpage, we have calculated some testing game values for you.
 # You can use them to check if your LP has been well specified.
 
-def root_value(root: History, player: Player) -> float:
+def root_value(root: Union[History, CompiledTree, SequenceForm],
+               player: Player,
+               backend: Union[str, Backend] = "gurobi",
+               presolve: bool = True) -> float:
     """Create sequence-form LP from supplied EFG tree and solve it.
 
     Do not rely on any specifics of the original maze problem.
@@ -74,139 +84,257 @@ def root_value(root: History, player: Player) -> float:
        In class, we identified folding as f1 and f2, based on the fact from which
        infoset they came from.
 
-    :param root: root history of the EFG tree
+    :param root: root history of the EFG tree, or the already compiled tree or its sequence form
     :param player: zero-indexed player: first player has index 0,
                  second player has index 1
+    :param backend: LP solver, either an instance or a name from BACKENDS
+    :param presolve: reduce the LP before it is passed to the solver
     :return: expected value in the root for given player
     """
-    lp = SequentialFormLP(root, player)
+    lp = SequentialFormLP(root, player, backend, presolve)
     return lp.solve()
 
 
+class GameSolution(NamedTuple):
+    values: Tuple[float, float]                # expected utility in the root for both players
+    strategies: Tuple[np.ndarray, np.ndarray]  # realization plans of both players
+    gap: float                                 # sum of the values, 0 up to the tolerance of the solver
+    exploitability: float                      # sum of both players' best response gains against the plans
+
+
+def solve_both(root: Union[History, CompiledTree, SequenceForm],
+               backend: Union[str, Backend] = "gurobi",
+               presolve: bool = True,
+               concurrent: bool = False) -> GameSolution:
+    """Solve the LPs of both players over a single compiled sequence form.
+
+    The LP of every player is still constructed for that player, only the tree,
+    the sequences and the payoff matrix are shared. If concurrent, the LPs are
+    solved by two threads, each with its own instance of the backend.
+    """
+    sequence_form = compile_sequence_form(root)
+    backend = get_backend(backend) if isinstance(backend, str) else backend
+    lps = [SequentialFormLP(sequence_form, Player(0), backend, presolve),
+           SequentialFormLP(sequence_form, Player(1), backend.fork() if concurrent else backend, presolve)]
+
+    if concurrent:
+        # every thread records its own stats, which are merged afterwards
+        run_stats = stats.current()
+        with ThreadPoolExecutor(2) as executor:
+            results = list(executor.map(lambda lp: stats.isolated(lp.solve, run_stats is not None), lps))
+        values = tuple(value for value, _ in results)
+        if run_stats is not None:
+            for _, lp_stats in results:
+                run_stats.merge(lp_stats)
+    else:
+        values = tuple(lp.solve() for lp in lps)
+
+    strategies = (lps[0].solution.realization, lps[1].solution.realization)
+    return GameSolution(values, strategies, values[0] + values[1], evaluate(sequence_form, strategies).exploitability)
+
+
+def approximate_root_value(root: Union[History, CompiledTree, SequenceForm],
+                           player: Player,
+                           iterations: Optional[int] = None,
+                           time_limit: Optional[float] = None,
+                           target_exploitability: Optional[float] = None) -> float:
+    """Approximate the expected utility in the root for the player with CFR+.
+
+    Iterates until any of the given limits is reached, so it can be used
+    in place of root_value when the LP is too large to build or solve.
+    """
+    solver = CFRPlus(compile_sequence_form(root))
+    with stats.phase("cfr"):
+        result = solver.solve(iterations, time_limit, target_exploitability)
+    stats.count("cfr_iterations", result.iterations)
+    return result.values[player]
+
+
+def sweep_root_values(root: Union[History, CompiledTree, SequenceForm],
+                      player: Player,
+                      hit_chances: Iterable[float],
+                      backend: Union[str, Backend] = "gurobi") -> List[float]:
+    """Expected utility in the root for the player for every given hit chance.
+
+    The game and its LP are built once and only the payoff coefficients
+    are updated for every hit chance, the hit chance of the root is ignored.
+    """
+    sweep = HitChanceSweep(compile_sequence_form(root), player, backend)
+    return [solution.value for solution in sweep.sweep(hit_chances)]
+
+
+def double_oracle_root_value(root: Union[History, CompiledTree, SequenceForm],
+                             player: Player,
+                             backend: Union[str, Backend] = "gurobi",
+                             max_iterations: Optional[int] = None,
+                             tolerance: float = 1e-6,
+                             verbose: bool = False) -> float:
+    """Expected utility in the root for the player computed by the double oracle.
+
+    Only LPs of small restricted games are solved, the bounds of the value
+    after every iteration are printed to stderr if verbose. The tolerance of
+    the bounds is relative to the value.
+    """
+    def report(iteration: int, bounds: Bounds):
+        print(f"iteration {iteration}: {bounds.lower} <= value <= {bounds.upper}", file=sys.stderr)
+
+    solver = DoubleOracle(compile_sequence_form(root), backend)
+    with stats.phase("double_oracle"):
+        result = solver.solve(max_iterations, tolerance, report if verbose else None)
+    stats.count("double_oracle_iterations", len(result.bounds))
+    return result.values[player]
+
+
 class SequentialFormLP:
-    root: History
+    root: Union[History, CompiledTree, SequenceForm]
     player: Player
 
-    # the LP itself
-    model: gp.Model
+    # the game tree compiled into flat arrays
+    tree: CompiledTree
 
-    # r variables, one per player's sequence
-    # represented as infoset-action pair
-    r_vars: Dict[str, gp.Var] = {}
+    # sequence-form matrices of both players
+    sequence_form: SequenceForm
 
-    # v variables, one per opponent's infoset
-    v_vars: Dict[str, gp.Var] = {}
+    # the LP solver
+    backend: Backend
 
-    # r constraints, one per player's infoset
-    r_constr: Dict[str, gp.Constr] = {}
-    r_constr_lhs: Dict[str, gp.LinExpr] = {}
+    # reduce the LP before it is passed to the solver, see Presolve
+    presolve: bool
 
-    # v constraints, one per opponent's sequence
-    # represented as infoset-action pair
-    v_constr: Dict[str, gp.Constr] = {}
-    v_constr_lhs: Dict[str, gp.LinExpr] = {}
+    # r variables, one per player's sequence, and
+    # v variables, one per opponent's infoset
+    solution: Optional[Solution]
 
     # NOTE:
-    # players' sequences are encoded as strings I:a, where I is an index of the infoset and
-    # a is an index of the taken action in the list of possible actions for this infoset.
-    # this representation works because in the game with perfect for every infoset there's
-    # exactly one sequence of actions of a player that leads to it.
-    # root sequences are denoted with a "root" string.
-    # also "root" is used as the name of a dummy infoset corresponding to an empty sequence
-    # of a given player.
-
-    def __init__(self, root: History, player: Player):
+    # players' sequences are indexed by integers, 0 is the empty sequence of a given player.
+    # opponent's infosets are indexed by rows of its constraint matrix, 0 is a dummy infoset
+    # corresponding to the empty sequence, so v[0] is the value of the game.
+    # the whole LP is passed to the solver in bulk as sparse matrices.
+
+    def __init__(self,
+                 root: Union[History, CompiledTree, SequenceForm],
+                 player: Player,
+                 backend: Union[str, Backend] = "gurobi",
+                 presolve: bool = True):
         self.root = root
         self.player = player
-        self.model = gp.Model()
+        self.sequence_form = compile_sequence_form(root)
+        self.tree = self.sequence_form.tree
+        self.backend = get_backend(backend) if isinstance(backend, str) else backend
+        self.presolve = presolve
+        self.solution = None
 
     def solve(self) -> float:
-        self.r_vars["root"] = self.model.addVar(lb=0, ub=1, vtype=gp.GRB.CONTINUOUS, name="r(root)")
-        self.r_constr_lhs["root"] = 1 - self.r_vars["root"]
-
-        self.v_vars["root"] = self.model.addVar(lb=-gp.GRB.INFINITY, vtype=gp.GRB.CONTINUOUS, name="v(root)")
-        self.v_constr_lhs["root"] = -self.v_vars["root"]
-
-        self._process(self.root, "root", "root", 1.)
-
-        for inf in self.r_constr_lhs:
-            self._make_r_constr(inf)
-        for seq in self.v_constr_lhs:
-            self._make_v_constr(seq)
-
-        self.model.setObjective(self.v_vars["root"], sense=gp.GRB.MAXIMIZE)
-
-        self.model.update()
-        self.model.optimize()
-        return self.model.objVal
-
-    def _process(self, history: History, player_seq: str, opponent_seq: str, chance: float):
-        player: Player = history.player
-        h_type: HistoryType = history.type()
-
-        if h_type == HistoryType.terminal:
-            sign = 1 if self.player == 0 else -1
-            value = sign * chance * history.utility()
-            self.v_constr_lhs[opponent_seq] += value * self.r_vars[player_seq]
-
-        elif h_type == HistoryType.chance:
-            for a in history.actions():
-                next_chance = chance * history.chance_prob(a)
-                self._process(history.child(a), player_seq, opponent_seq, next_chance)
-
-        else:
-            infoset: str = str(history.infoset().index())
-            if player == self.player:
-                # create a new r-constraint corresponding to the current infoset
-                if infoset not in self.r_constr_lhs:
-                    self.r_constr_lhs[infoset] = self.r_vars[player_seq]
-
-                for i, a in enumerate(history.actions()):
-                    next_seq = f"{infoset}:{i}"
-                    # create a new r-variable corresponding to a given sequence extension
-                    if next_seq not in self.r_vars:
-                        self.r_vars[next_seq] = self.model.addVar(
-                            ub=1, vtype=gp.GRB.CONTINUOUS, name=f"r({next_seq})")
-                        self.r_constr_lhs[infoset] -= self.r_vars[next_seq]
-
-                    self._process(history.child(a), next_seq, opponent_seq, chance)
-
-            else:
-                # create a new v-variable corresponding to the current infoset
-                if infoset not in self.v_vars:
-                    self.v_vars[infoset] = self.model.addVar(
-                        lb=-gp.GRB.INFINITY, vtype=gp.GRB.CONTINUOUS, name=f"v({infoset})")
-                    self.v_constr_lhs[opponent_seq] += self.v_vars[infoset]
-
-                for i, a in enumerate(history.actions()):
-                    next_seq = f"{infoset}:{i}"
-                    # create a new v-constraint corresponding to a given sequence extension
-                    if next_seq not in self.v_constr_lhs:
-                        self.v_constr_lhs[next_seq] = -self.v_vars[infoset]
-
-                    self._process(history.child(a), player_seq, next_seq, chance)
-
-    def _make_r_constr(self, infoset: str):
-        if infoset in self.r_constr:
-            return
-        self.r_constr[infoset] = self.model.addConstr(self.r_constr_lhs[infoset] == 0, name=f"r-constr {infoset}")
-        self.model.update()
-
-    def _make_v_constr(self, sequence: str):
-        if sequence in self.v_constr:
-            return
-        self.v_constr[sequence] = self.model.addConstr(self.v_constr_lhs[sequence] >= 0, name=f"v-constr {sequence}")
-        self.model.update()
+        with stats.phase("lp_assembly"):
+            lp = self.sequence_form.lp(self.player)
+        stats.record_lp(*lp)
+
+        if not self.presolve:
+            self.solution = self.backend.solve(*lp)
+            return self.solution.value
+
+        with stats.phase("presolve"):
+            presolve = Presolve(self.sequence_form, self.player)
+        self.solution = presolve.expand(self.backend.solve(*presolve.lp()))
+        return self.solution.value
+
+    def exploitability(self) -> float:
+        # how much the solved realization plan loses against the opponent's best response
+        # compared to the value of the LP, 0 up to the tolerance of the solver
+        assert self.solution is not None, "The LP must be solved first"
+        response = best_response(self.sequence_form, Player(1 - self.player), self.solution.realization)
+        return self.solution.value + response.value
 
 
 # Do not modify code below.
 def main():
+    parser = argparse.ArgumentParser(description="Solve the game read from stdin for a given player.")
+    parser.add_argument("--both", action="store_true",
+                        help="solve the LPs of both players, print both values and ignore the player line")
+    parser.add_argument("--concurrent", action="store_true", help="solve the LPs of both players by two threads")
+    parser.add_argument("--solver", choices=("lp", "cfr", "double-oracle"), default="lp",
+                        help="solve the sequence-form LP exactly, approximate it with CFR+, "
+                             "or solve restricted games by the double oracle")
+    parser.add_argument("--backend", choices=BACKENDS, help="LP solver, gurobi by default")
+    parser.add_argument("--iterations", type=int, help="CFR+ or double oracle iteration limit")
+    parser.add_argument("--verbose", action="store_true", help="print the bounds of every double oracle iteration")
+    parser.add_argument("--time-limit", type=float, help="CFR+ time limit in seconds")
+    parser.add_argument("--target-exploitability", type=float, help="CFR+ exploitability target")
+    parser.add_argument("--no-presolve", dest="presolve", action="store_false",
+                        help="pass the full LP to the solver")
+    parser.add_argument("--hit-chances", type=float, nargs="+", metavar="H",
+                        help="solve the LP for each of these hit chances, one value per line")
+    parser.add_argument("--efg", metavar="FILE",
+                        help="read the game from a Gambit .efg file, stdin then holds only the player")
+    parser.add_argument("--processes", type=int, help="compile the tree with a pool of processes")
+    parser.add_argument("--batched", action="store_true", help="expand the tree level by level with NumPy")
+    parser.add_argument("--cache", help="directory of the cache of compiled games")
+    parser.add_argument("--cache-size", type=int, help="size limit of the cache in MB, 1024 by default")
+    parser.add_argument("--stats", nargs="?", const="-", metavar="FILE",
+                        help="report timings, sizes and peak memory to stderr, or as JSON to a file")
+    args = parser.parse_args()
+    if args.solver == "cfr" and args.iterations is None and args.time_limit is None \
+            and args.target_exploitability is None:
+        parser.error("CFR+ requires at least one of --iterations, --time-limit or --target-exploitability")
+    if args.efg and (args.processes is not None or args.batched or args.cache):
+        parser.error("--efg reads a compiled tree, it can't be combined with --processes, --batched or --cache")
+    if args.both and (args.solver != "lp" or args.hit_chances):
+        parser.error("--both solves the LPs, it can't be combined with --solver or --hit-chances")
+    if args.concurrent and not args.both:
+        parser.error("--concurrent requires --both")
+    if args.hit_chances and (args.solver != "lp" or not args.presolve):
+        parser.error("--hit-chances re-solves the LP without presolve, "
+                     "it can't be combined with --solver or --no-presolve")
+    if args.solver != "lp" and not args.presolve:
+        parser.error("--no-presolve applies only to --solver lp")
+    if args.solver == "cfr" and args.backend is not None:
+        parser.error("CFR+ doesn't solve LPs, it can't be combined with --backend")
+    if args.solver == "lp" and args.iterations is not None:
+        parser.error("--iterations requires --solver cfr or double-oracle")
+    if args.solver != "cfr" and (args.time_limit is not None or args.target_exploitability is not None):
+        parser.error("--time-limit and --target-exploitability require --solver cfr")
+    if args.solver != "double-oracle" and args.verbose:
+        parser.error("--verbose requires --solver double-oracle")
+    if args.cache_size is not None and not args.cache:
+        parser.error("--cache-size requires --cache")
+    backend = args.backend or "gurobi"
+    if args.stats:
+        stats.enable()
+
     # read input specification in the body of this function
-    root_history = create_root()
+    if args.efg:
+        with open(args.efg) as f, stats.phase("parse"):
+            root_history = read_efg(f)
+        if args.hit_chances and not HitChanceSweep.hit_nodes(root_history).any():
+            parser.error("--hit-chances requires a game with Hit and Miss chance nodes")
+    else:
+        root_history = create_root()
     # additionally specify for which player it should be solved
-    player = int(input())
-
-    print(root_value(root_history, Player(player)))
+    player = int(input()) if not args.both else None
+    cache = GameCache(args.cache, (args.cache_size or 1024) << 20) if args.cache else None
+    sequence_form = compile_sequence_form(root_history, args.processes, cache, args.batched)
+
+    if args.both:
+        solution = solve_both(sequence_form, backend, args.presolve, args.concurrent)
+        print(*solution.values, sep="\n")
+        if abs(solution.gap) > 1e-6 or solution.exploitability > 1e-6:
+            print(f"Inconsistent solutions: gap {solution.gap}, exploitability {solution.exploitability}",
+                  file=sys.stderr)
+    elif args.hit_chances:
+        for hit_chance, value in zip(args.hit_chances, sweep_root_values(sequence_form, Player(player),
+                                                                         args.hit_chances, backend)):
+            print(hit_chance, value)
+    elif args.solver == "double-oracle":
+        print(double_oracle_root_value(sequence_form, Player(player), backend, args.iterations,
+                                       verbose=args.verbose))
+    elif args.solver == "cfr":
+        print(approximate_root_value(sequence_form, Player(player), args.iterations, args.time_limit,
+                                     args.target_exploitability))
+    else:
+        print(root_value(sequence_form, Player(player), backend, args.presolve))
+
+    if args.stats:
+        stats.current().write(None if args.stats == "-" else args.stats)
 
 
 if __name__ == "__main__":
@@ -1,21 +1,29 @@
-from typing import List, Optional, Tuple
+import argparse
+import gzip
+import io
+import sys
+from typing import Callable, List, Optional, TextIO, Tuple, Union
 
-from game import History, HistoryType, Infoset, Location, Maze, Cell
+from game import (
+    History, HistoryType, GameContext, Location, Maze, Cell,
+    CompiledTree, GameCache, LazyTree, compile_game, stats
+)
 
 
-def read() -> Tuple[Maze, int, float]:
+def read(readline: Callable[[], str] = input) -> Tuple[Maze, int, float]:
+    # the specification is read line by line from stdin unless another source is given
     maze_data: List[List[Cell]] = []
     start: Optional[Location] = None
     goal: Optional[Location] = None
     golds: List[Location] = []
     dangers: List[Location] = []
 
-    M = int(input())
-    N = int(input())
+    M = int(readline())
+    N = int(readline())
     assert M and N
 
     for y in range(M):
-        row = input()
+        row = readline()
         assert len(row) == N
 
         maze_row = []
@@ -41,61 +49,139 @@ def read() -> Tuple[Maze, int, float]:
     assert start != goal, "Start and goal locations must be different"
     maze = Maze(maze_data, start, goal, golds, dangers)
 
-    num_bandits = int(input())
+    num_bandits = int(readline())
     assert 0 < num_bandits <= len(dangers)
 
-    hit_chance = float(input())
+    hit_chance = float(readline())
     assert 0 <= hit_chance <= 1, "Come on..."
 
     return maze, num_bandits, hit_chance
 
 
-def create_root() -> History:
-    maze, num_bandits, hit_chance = read()
-    Infoset.init(num_bandits, num_dangers=len(maze.dangers))
-    return History(maze, num_bandits, hit_chance)
+def create_root(readline: Callable[[], str] = input) -> History:
+    with stats.phase("parse"):
+        maze, num_bandits, hit_chance = read(readline)
+    return History(GameContext(maze, num_bandits, hit_chance))
 
 
 def export_gambit(root_history: History) -> str:
+    buffer = io.StringIO()
+    write_gambit(root_history, buffer)
+    return buffer.getvalue()
+
+
+def write_gambit(root: Union[History, CompiledTree], stream: TextIO, compact: bool = False):
+    # write the game in the Gambit format line by line, without keeping the output in memory.
+    # compact output omits the indentation and the names of the actions.
+    tree = compile_game(root)
+
+    node_type = tree.node_type.tolist()
+    player = tree.player.tolist()
+    infoset = tree.infoset.tolist()
+    utility = tree.utility.tolist()
+    chance_prob = tree.chance_prob.tolist()
+    depth = tree.depth.tolist()
+    first_child = tree.first_child.tolist()
+    num_children = tree.num_children.tolist()
+    names = [f"\"{label}\"" for label in tree.labels] if not compact else ["\"\""] * len(tree.labels)
+    label = tree.label.tolist()
+
     players = ' '.join([f"\"Pl{i}\"" for i in range(2)])
-    ret = f"EFG 2 R \"\" {{ {players} }} \n"
+    stream.write(f"EFG 2 R \"\" {{ {players} }} \n")
 
     terminal_idx = 1
     chance_idx = 1
 
-    def build_tree(history, depth):
-        nonlocal ret, terminal_idx, chance_idx
-
-        ret += " " * depth  # add nice spacing
+    # nodes are visited in a depth-first order
+    stack = [0]
+    while stack:
+        node = stack.pop()
+        children = range(first_child[node], first_child[node] + num_children[node])
+        indent = "" if compact else " " * depth[node]  # add nice spacing
 
-        if history.type() == HistoryType.terminal:
-            util = history.utility()
-            ret += f"t \"{history}\" {terminal_idx} \"\" "
-            ret += f"{{ {util}, {-util} }}\n"
+        if node_type[node] == HistoryType.terminal:
+            util = utility[node]
+            stream.write(f"{indent}t \"\" {terminal_idx} \"\" {{ {util}, {-util} }}\n")
             terminal_idx += 1
-            return
 
-        if history.type() == HistoryType.chance:
-            ret += f"c \"{history}\" {chance_idx} \"\" {{ "
-            ret += " ".join([f"\"{str(action)}\" {history.chance_prob(action):.3f}"
-                             for action in history.actions()])
-            ret += " } 0\n"
+        elif node_type[node] == HistoryType.chance:
+            actions = " ".join([f"{names[label[child]]} {chance_prob[child]:.3f}" for child in children])
+            stream.write(f"{indent}c \"\" {chance_idx} \"\" {{ {actions} }} 0\n")
             chance_idx += 1
 
         else:  # player node
-            player = int(history.current_player()) + 1  # cannot be indexed from 0
-            infoset = history.infoset()
-            ret += f"p \"{history}\" {player} {infoset.index()} \"\" {{ "
-            ret += " ".join([f"\"{str(action)}\"" for action in history.actions()])
-            ret += " } 0\n"
+            actions = " ".join([names[label[child]] for child in children])
+            # players cannot be indexed from 0
+            stream.write(f"{indent}p \"\" {player[node] + 1} {infoset[node]} \"\" {{ {actions} }} 0\n")
+
+        stack.extend(reversed(children))
+
+
+def write_gambit_lazy(tree: LazyTree, stream: TextIO, compact: bool = False):
+    # write the game in the same format as write_gambit without compiling it, every node is
+    # expanded once and only the unvisited siblings of the current path are held in memory
+    players = ' '.join([f"\"Pl{i}\"" for i in range(2)])
+    stream.write(f"EFG 2 R \"\" {{ {players} }} \n")
+
+    terminal_idx = 1
+    chance_idx = 1
+
+    for node, history, actions in tree.walk():
+        indent = "" if compact else " " * node.depth
+        names = [f"\"{action}\"" if not compact else "\"\"" for action in actions]
+        h_type = history.type()
+
+        if h_type == HistoryType.terminal:
+            util = history.utility()
+            stream.write(f"{indent}t \"\" {terminal_idx} \"\" {{ {util}, {-util} }}\n")
+            terminal_idx += 1
 
-        for action in history.actions():
-            child = history.child(action)
-            build_tree(child, depth + 1)
+        elif h_type == HistoryType.chance:
+            probs = " ".join([f"{name} {history.chance_prob(a):.3f}" for name, a in zip(names, actions)])
+            stream.write(f"{indent}c \"\" {chance_idx} \"\" {{ {probs} }} 0\n")
+            chance_idx += 1
 
-    build_tree(root_history, 0)
-    return ret
+        else:  # player node
+            stream.write(f"{indent}p \"\" {history.current_player() + 1} {history.infoset().index()} \"\" "
+                         f"{{ {' '.join(names)} }} 0\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the game read from stdin in the Gambit format.")
+    parser.add_argument("--output", "-o", help="output file, compressed if it ends with .gz (default: stdout)")
+    parser.add_argument("--compact", action="store_true", help="omit the indentation and the names of the actions")
+    parser.add_argument("--processes", type=int, help="compile the tree with a pool of processes")
+    parser.add_argument("--batched", action="store_true", help="expand the tree level by level with NumPy")
+    parser.add_argument("--lazy", action="store_true",
+                        help="write the tree while expanding it, without compiling it or keeping it in memory")
+    parser.add_argument("--cache", help="directory of the cache of compiled games")
+    parser.add_argument("--cache-size", type=int, default=1024, help="size limit of the cache in MB")
+    parser.add_argument("--stats", nargs="?", const="-", metavar="FILE",
+                        help="report timings, sizes and peak memory to stderr, or as JSON to a file")
+    args = parser.parse_args()
+    if args.lazy and (args.processes is not None or args.batched or args.cache):
+        parser.error("--lazy doesn't compile the tree, it can't be combined with --processes, --batched or --cache")
+    if args.stats:
+        stats.enable()
+
+    if args.lazy:
+        root, write = LazyTree(create_root()), write_gambit_lazy
+    else:
+        cache = GameCache(args.cache, args.cache_size << 20) if args.cache else None
+        root, write = compile_game(create_root(), args.processes, cache, args.batched), write_gambit
+    with stats.phase("export"):
+        if args.output is None:
+            write(root, sys.stdout, args.compact)
+        elif args.output.endswith(".gz"):
+            with gzip.open(args.output, "wt") as f:
+                write(root, f, args.compact)
+        else:
+            with open(args.output, "w") as f:
+                write(root, f, args.compact)
+
+    if args.stats:
+        stats.current().write(None if args.stats == "-" else args.stats)
 
 
 if __name__ == '__main__':
-    print(export_gambit(create_root()))
+    main()
@@ -0,0 +1,79 @@
+from typing import List, Tuple
+
+import numpy as np
+
+from game import CompiledTree, History, HistoryType, Player
+from game_tree import create_root
+
+# sample specifications and the values of the game for the first player
+SPECS = {
+    "s1": ("3\n5\nS-E-D\n#-#-#\nG-E--\n1\n0.5", 7.5),
+    "s2": ("5\n6\nS--E-#\n-##-#-\n-E--ED\n-#G#--\nE----#\n2\n0.3", 8.660194174757281),
+    "s3": ("4\n4\nS-E-\n-#-E\nE-G-\n--ED\n2\n0.4", 6.6),
+}
+
+# LP solver of the tests, which doesn't need a license
+BACKEND = "highs"
+
+
+def maze_root(name: str, hit_chance: float = None) -> History:
+    lines = SPECS[name][0].splitlines()
+    if hit_chance is not None:
+        lines[-1] = str(hit_chance)
+    return create_root(iter(lines).__next__)
+
+
+# arrays of CompiledTree, the others are derived from them
+TREE_ARRAYS = ("node_type", "parent", "player", "infoset", "action", "chance_prob", "utility", "label")
+
+
+def assert_same_tree(expected: CompiledTree, actual: CompiledTree):
+    assert actual.labels == expected.labels
+    for name in TREE_ARRAYS:
+        np.testing.assert_array_equal(getattr(actual, name), getattr(expected, name), err_msg=name)
+
+
+class GenericInfoset:
+    def __init__(self, index: int):
+        self._index = index
+
+    def index(self) -> int:
+        return self._index
+
+
+class GenericHistory:
+    # a game which only implements the original History interface: chance picks a bonus with
+    # probability 0.2, then both players play matching pennies without observing anything.
+    # the value for the first player is 0.2 * 5 = 1.
+
+    VALUE = 1.
+
+    def __init__(self, path: Tuple[str, ...] = ()):
+        self.path = path
+
+    def __str__(self) -> str:
+        return ""
+
+    def type(self) -> HistoryType:
+        if not self.path:
+            return HistoryType.chance
+        return HistoryType.decision if len(self.path) < 3 else HistoryType.terminal
+
+    def current_player(self) -> Player:
+        return [Player.chance, Player(0), Player(1), Player.terminal][len(self.path)]
+
+    def infoset(self) -> GenericInfoset:
+        return GenericInfoset(len(self.path))
+
+    def actions(self) -> List[str]:
+        return ["Bonus", "None"] if not self.path else ["Heads", "Tails"]
+
+    def chance_prob(self, action: str) -> float:
+        return 0.2 if action == "Bonus" else 0.8
+
+    def child(self, action: str) -> 'GenericHistory':
+        return GenericHistory(self.path + (action,))
+
+    def utility(self) -> float:
+        bonus, first, second = self.path
+        return (1. if first == second else -1.) + (5. if bonus == "Bonus" else 0.)
@@ -0,0 +1,10 @@
+import pytest
+
+from game import compile_tree, compile_tree_batched
+
+from .games import SPECS, assert_same_tree, maze_root
+
+
+@pytest.mark.parametrize("name", SPECS)
+def test_batched_tree_is_identical(name):
+    assert_same_tree(compile_tree(maze_root(name)), compile_tree_batched(maze_root(name)))
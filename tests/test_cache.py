@@ -0,0 +1,80 @@
+import os
+
+import numpy as np
+import pytest
+
+from game import GameCache, Player, Sequences, compile_sequence_form
+from game_lp import root_value
+
+from .games import BACKEND, SPECS, TREE_ARRAYS, maze_root
+
+
+def entry_size(cache: GameCache, name: str) -> int:
+    path = os.path.join(cache.directory, cache.key(maze_root(name)))
+    return sum(os.path.getsize(os.path.join(directory, file))
+               for directory, _, files in os.walk(path) for file in files)
+
+
+def cached(cache: GameCache) -> set:
+    # names of the stored games
+    keys = {cache.key(maze_root(name)): name for name in SPECS}
+    return {keys[entry] for entry in os.listdir(cache.directory)}
+
+
+@pytest.mark.parametrize("name", SPECS)
+def test_round_trip(name, tmp_path):
+    cache = GameCache(str(tmp_path))
+    expected = compile_sequence_form(maze_root(name))
+    cache.store(maze_root(name), expected)
+    actual = cache.load(maze_root(name))
+
+    assert actual.tree.labels == expected.tree.labels
+    for array in TREE_ARRAYS:
+        np.testing.assert_array_equal(getattr(actual.tree, array), getattr(expected.tree, array), err_msg=array)
+    for player in range(2):
+        for array in Sequences.ARRAYS:
+            np.testing.assert_array_equal(getattr(actual.sequences[player], array),
+                                          getattr(expected.sequences[player], array), err_msg=array)
+    assert (actual.payoff != expected.payoff).nnz == 0
+    assert root_value(actual, Player(0), BACKEND) == pytest.approx(SPECS[name][1])
+
+
+def test_existing_entry_is_reused(tmp_path):
+    cache = GameCache(str(tmp_path))
+    assert cache.load(maze_root("s1")) is None
+    compile_sequence_form(maze_root("s1"), cache=cache)
+    path = os.path.join(cache.directory, cache.key(maze_root("s1")))
+    os.utime(path, (0, 0))
+
+    # the arrays are memory-mapped from the stored entry, which is marked as recently used
+    sequence_form = compile_sequence_form(maze_root("s1"), cache=cache)
+    assert isinstance(sequence_form.tree.parent, np.memmap)
+    assert os.stat(path).st_mtime > 0
+    assert cached(cache) == {"s1"}
+
+
+def test_least_recently_used_are_evicted(tmp_path):
+    scratch = GameCache(str(tmp_path / "scratch"))
+    for name in SPECS:
+        scratch.store(maze_root(name), compile_sequence_form(maze_root(name)))
+    sizes = {name: entry_size(scratch, name) for name in SPECS}
+
+    # s2 is the least recently used one once s3 is stored
+    cache = GameCache(str(tmp_path / "cache"), max_bytes=sum(sizes.values()) - 1)
+    for time, name in enumerate(("s1", "s2")):
+        cache.store(maze_root(name), compile_sequence_form(maze_root(name)))
+        os.utime(os.path.join(cache.directory, cache.key(maze_root(name))), (time, time))
+    cache.load(maze_root("s1"))
+    cache.store(maze_root("s3"), compile_sequence_form(maze_root("s3")))
+    assert cached(cache) == {"s1", "s3"}
+
+
+def test_labels_count_against_the_size(tmp_path):
+    scratch = GameCache(str(tmp_path / "scratch"))
+    scratch.store(maze_root("s2"), compile_sequence_form(maze_root("s2")))
+    labels = os.path.getsize(os.path.join(scratch.directory, scratch.key(maze_root("s2")), "labels.json"))
+
+    # the arrays fit, but not together with the labels
+    cache = GameCache(str(tmp_path / "cache"), max_bytes=entry_size(scratch, "s2") - labels)
+    cache.store(maze_root("s2"), compile_sequence_form(maze_root("s2")))
+    assert cached(cache) == set()
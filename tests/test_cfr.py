@@ -0,0 +1,22 @@
+import pytest
+
+from game import CFRPlus, Player, compile_sequence_form
+from game_lp import approximate_root_value
+
+from .games import SPECS, maze_root
+
+
+@pytest.mark.parametrize("name", SPECS)
+def test_cfr_values(name):
+    sequence_form = compile_sequence_form(maze_root(name))
+    result = CFRPlus(sequence_form).solve(target_exploitability=1e-3)
+    assert result.exploitability <= 1e-3
+    # each player's value is within the exploitability of the game value
+    assert result.values[0] == pytest.approx(SPECS[name][1], abs=1e-3)
+    assert result.values[1] == pytest.approx(-SPECS[name][1], abs=1e-3)
+
+
+def test_approximate_root_values():
+    sequence_form = compile_sequence_form(maze_root("s1"))
+    assert approximate_root_value(sequence_form, Player(0), iterations=200) == pytest.approx(SPECS["s1"][1], abs=1e-2)
+    assert approximate_root_value(sequence_form, Player(1), iterations=200) == pytest.approx(-SPECS["s1"][1], abs=1e-2)
@@ -0,0 +1,16 @@
+from game import HistoryType, compile_tree
+
+from .games import maze_root
+
+
+def test_games_dont_share_infosets():
+    # creating and compiling another game doesn't change the infoset indexes of a game
+    root = maze_root("s2")
+    histories = [root]
+    while histories[-1].type() != HistoryType.terminal:
+        histories.append(histories[-1].child(histories[-1].actions()[-1]))
+    decisions = [h for h in histories if h.type() == HistoryType.decision]
+    indexes = [h.infoset().index() for h in decisions]
+
+    compile_tree(maze_root("s1"))
+    assert [h.infoset().index() for h in decisions] == indexes
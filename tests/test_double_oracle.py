@@ -0,0 +1,31 @@
+import pytest
+
+from game import DoubleOracle, Player, compile_sequence_form, evaluate
+from game_lp import double_oracle_root_value
+
+from .games import BACKEND, SPECS, maze_root
+
+
+@pytest.mark.parametrize("name", SPECS)
+def test_double_oracle(name):
+    sequence_form = compile_sequence_form(maze_root(name))
+    result = DoubleOracle(sequence_form, BACKEND).solve()
+    assert result.values == pytest.approx((SPECS[name][1], -SPECS[name][1]))
+    assert result.bounds[-1].lower == pytest.approx(result.bounds[-1].upper)
+    assert evaluate(sequence_form, result.strategies).exploitability < 1e-6
+
+
+@pytest.mark.parametrize("name", SPECS)
+def test_double_oracle_stops_without_new_strategies(name):
+    # the bounds can't meet up to a zero tolerance because of the tolerance of the LP solver
+    result = DoubleOracle(compile_sequence_form(maze_root(name)), BACKEND).solve(max_iterations=100, tolerance=0.)
+    assert len(result.bounds) < 100
+    assert result.values[0] == pytest.approx(SPECS[name][1])
+
+
+@pytest.mark.parametrize("name", SPECS)
+def test_double_oracle_root_values(name):
+    # the value of every player comes from the restricted LP of that player
+    sequence_form = compile_sequence_form(maze_root(name))
+    assert double_oracle_root_value(sequence_form, Player(0), BACKEND) == pytest.approx(SPECS[name][1])
+    assert double_oracle_root_value(sequence_form, Player(1), BACKEND) == pytest.approx(-SPECS[name][1])
@@ -0,0 +1,46 @@
+import io
+
+import numpy as np
+import pytest
+
+from game import HistoryType, Player, compile_tree, read_efg
+from game_lp import root_value
+from game_tree import write_gambit
+
+from .games import BACKEND, SPECS, maze_root
+
+
+def gambit(root) -> str:
+    buffer = io.StringIO()
+    write_gambit(root, buffer)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("name", SPECS)
+def test_efg_round_trip(name):
+    text = gambit(maze_root(name))
+    tree = read_efg(io.StringIO(text))
+    assert gambit(tree) == text
+    expected = compile_tree(maze_root(name))
+    for array in ("node_type", "parent", "player", "infoset", "action", "chance_prob", "utility"):
+        np.testing.assert_array_equal(getattr(tree, array), getattr(expected, array), err_msg=array)
+
+
+@pytest.mark.parametrize("name", SPECS)
+def test_efg_values(name):
+    tree = read_efg(io.StringIO(gambit(maze_root(name))))
+    assert root_value(tree, Player(0), BACKEND) == pytest.approx(SPECS[name][1])
+    assert root_value(tree, Player(1), BACKEND) == pytest.approx(-SPECS[name][1])
+
+
+def test_efg_reader_features():
+    # rationals, reused outcomes and actions, a non-terminal outcome and a multi-line comment
+    text = ('EFG 2 R "game" { "A" "B" }\n"multi-line\ncomment"\n'
+            'c "" 1 "" { "x" 1/4 "y" 3/4 } 1 "bonus" { 1, -1 }\n'
+            ' t "" 2 "" { 2, -2 }\n'
+            ' p "" 1 1 "" { "l" "r" } 0\n'
+            '  t "" 2\n'
+            '  t "" 3 "" { -1/2, 1/2 }\n')
+    tree = read_efg(io.StringIO(text))
+    np.testing.assert_allclose(tree.chance_prob[1:3], [.25, .75])
+    np.testing.assert_allclose(tree.utility[tree.node_type == HistoryType.terminal], [3., 3., .5])
@@ -0,0 +1,52 @@
+import ast
+import io
+import sys
+from pathlib import Path
+
+import pytest
+
+import game_lp
+
+from .games import SPECS
+
+
+def test_game_lp_only_needs_create_root():
+    # game_lp.py is run against a test version of game_tree.py, which only provides create_root
+    source = (Path(__file__).parent.parent / "game_lp.py").read_text()
+    imported = [alias.name for node in ast.walk(ast.parse(source))
+                if isinstance(node, ast.ImportFrom) and node.module == "game_tree" for alias in node.names]
+    assert imported == ["create_root"]
+
+
+@pytest.mark.parametrize("args", [
+    ["--efg", "game.efg", "--processes", "2"],
+    ["--efg", "game.efg", "--batched"],
+    ["--efg", "game.efg", "--cache", "cache"],
+    ["--both", "--solver", "cfr", "--iterations", "10"],
+    ["--both", "--hit-chances", "0.5"],
+    ["--concurrent"],
+    ["--hit-chances", "0.5", "--solver", "cfr", "--iterations", "10"],
+    ["--hit-chances", "0.5", "--solver", "double-oracle"],
+    ["--hit-chances", "0.5", "--no-presolve"],
+    ["--solver", "double-oracle", "--no-presolve"],
+    ["--solver", "cfr", "--iterations", "10", "--backend", "highs"],
+    ["--iterations", "10"],
+    ["--solver", "double-oracle", "--time-limit", "1"],
+    ["--solver", "cfr", "--iterations", "10", "--verbose"],
+    ["--cache-size", "10"],
+])
+def test_ignored_options_are_rejected(args, monkeypatch, capsys):
+    monkeypatch.setattr(sys, "argv", ["game_lp.py", *args])
+    with pytest.raises(SystemExit) as exit_info:
+        game_lp.main()
+    assert exit_info.value.code == 2
+    assert "error" in capsys.readouterr().err
+
+
+def test_hit_chances(monkeypatch, capsys):
+    monkeypatch.setattr(sys, "argv", ["game_lp.py", "--backend", "highs", "--hit-chances", "0.5"])
+    monkeypatch.setattr(sys, "stdin", io.StringIO(SPECS["s1"][0] + "\n0\n"))
+    game_lp.main()
+    hit_chance, value = capsys.readouterr().out.split()
+    assert float(hit_chance) == .5
+    assert float(value) == pytest.approx(SPECS["s1"][1])
@@ -0,0 +1,32 @@
+import io
+
+import pytest
+
+from game import Player, TranspositionTable, compile_tree, read_efg
+from game_lp import approximate_root_value, double_oracle_root_value, root_value
+from game_tree import write_gambit
+
+from .games import BACKEND, GenericHistory
+
+
+def test_generic_history_compiles():
+    tree = compile_tree(GenericHistory(), TranspositionTable())
+    assert tree.size == 15
+    buffer = io.StringIO()
+    write_gambit(tree, buffer)
+    assert read_efg(io.StringIO(buffer.getvalue())).size == tree.size
+
+
+@pytest.mark.parametrize("presolve", [True, False])
+def test_generic_history_values(presolve):
+    root = GenericHistory()
+    assert root_value(root, Player(0), BACKEND, presolve) == pytest.approx(GenericHistory.VALUE)
+    assert root_value(root, Player(1), BACKEND, presolve) == pytest.approx(-GenericHistory.VALUE)
+
+
+def test_generic_history_approximations():
+    root = GenericHistory()
+    assert double_oracle_root_value(root, Player(0), BACKEND) == pytest.approx(GenericHistory.VALUE)
+    assert double_oracle_root_value(root, Player(1), BACKEND) == pytest.approx(-GenericHistory.VALUE)
+    assert approximate_root_value(root, Player(0), iterations=1000) == pytest.approx(GenericHistory.VALUE, abs=1e-2)
+    assert approximate_root_value(root, Player(1), iterations=1000) == pytest.approx(-GenericHistory.VALUE, abs=1e-2)
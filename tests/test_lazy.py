@@ -0,0 +1,30 @@
+import io
+
+import pytest
+
+from game import LazyTree, compile_tree
+from game.lazy import ROOT
+from game_tree import write_gambit, write_gambit_lazy
+
+from .games import SPECS, maze_root
+
+
+@pytest.mark.parametrize("name", SPECS)
+def test_lazy_export_is_identical(name):
+    expected, actual = io.StringIO(), io.StringIO()
+    write_gambit(maze_root(name), expected)
+    tree = LazyTree(maze_root(name), max_nodes=10)
+    write_gambit_lazy(tree, actual)
+    assert actual.getvalue() == expected.getvalue()
+    assert tree.expanded == compile_tree(maze_root(name)).size
+
+
+def test_colliding_nodes_are_distinct():
+    tree = LazyTree(maze_root("s2"), max_nodes=10)
+    first, second = ROOT.child(0).child(0), ROOT.child(1).child(0)
+    second._hash = first._hash  # a collision of the hashes of the paths
+    assert first != second
+
+    tree.history(first)
+    actions = [tree.actions(ROOT)[1], tree.actions(ROOT.child(1))[0]]
+    assert tree.history(second).history.to_list() == actions
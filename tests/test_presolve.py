@@ -0,0 +1,14 @@
+import pytest
+
+from game import Player
+from game_lp import root_value
+
+from .games import BACKEND, SPECS, maze_root
+
+
+@pytest.mark.parametrize("name", SPECS)
+@pytest.mark.parametrize("presolve", [True, False])
+def test_root_values(name, presolve):
+    value = SPECS[name][1]
+    assert root_value(maze_root(name), Player(0), BACKEND, presolve) == pytest.approx(value)
+    assert root_value(maze_root(name), Player(1), BACKEND, presolve) == pytest.approx(-value)
@@ -0,0 +1,28 @@
+import pytest
+
+from game import stats
+from game_lp import solve_both
+
+from .games import BACKEND, SPECS, maze_root
+
+
+@pytest.mark.parametrize("name", SPECS)
+@pytest.mark.parametrize("concurrent", [False, True])
+def test_solve_both(name, concurrent):
+    solution = solve_both(maze_root(name), BACKEND, concurrent=concurrent)
+    assert solution.values[0] == pytest.approx(SPECS[name][1])
+    assert solution.values[1] == pytest.approx(-SPECS[name][1])
+    assert solution.gap == pytest.approx(0., abs=1e-6)
+    assert solution.exploitability == pytest.approx(0., abs=1e-6)
+
+
+def test_concurrent_stats_are_merged():
+    # both threads record into their own stats, which are merged into the caller's ones
+    run_stats = stats.enable()
+    try:
+        solve_both(maze_root("s1"), BACKEND, presolve=False, concurrent=True)
+    finally:
+        stats.disable()
+    serial_stats = stats.isolated(lambda: solve_both(maze_root("s1"), BACKEND, presolve=False))[1]
+    assert run_stats.counters == serial_stats.counters
+    assert run_stats.phases.keys() == serial_stats.phases.keys()
@@ -0,0 +1,21 @@
+import pytest
+
+from game import HitChanceSweep, Player, compile_sequence_form, compile_tree
+from game_lp import root_value
+
+from .games import BACKEND, SPECS, GenericHistory, maze_root
+
+
+@pytest.mark.parametrize("name", SPECS)
+def test_sweep_matches_rebuilt_lps(name):
+    hit_chances = [0., .1, .7, 1.]
+    sweep = HitChanceSweep(compile_sequence_form(maze_root(name)), Player(0), BACKEND)
+    for hit_chance, solution in zip(hit_chances, sweep.sweep(hit_chances)):
+        assert solution.value == pytest.approx(root_value(maze_root(name, hit_chance), Player(0), BACKEND))
+
+
+def test_sweep_keeps_other_chance_probabilities():
+    sequence_form = compile_sequence_form(compile_tree(GenericHistory()))
+    assert not HitChanceSweep.hit_nodes(sequence_form.tree).any()
+    for solution in HitChanceSweep(sequence_form, Player(0), BACKEND).sweep([.1, .9]):
+        assert solution.value == pytest.approx(GenericHistory.VALUE)
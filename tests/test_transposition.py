@@ -0,0 +1,17 @@
+import pytest
+
+from game import TranspositionTable, compile_tree
+
+from .games import SPECS, assert_same_tree, maze_root
+
+
+@pytest.mark.parametrize("name", SPECS)
+def test_transpositions_dont_change_the_tree(name):
+    assert_same_tree(compile_tree(maze_root(name)), compile_tree(maze_root(name), TranspositionTable(100)))
+
+
+def test_subtrees_are_reused():
+    # s2 reaches the same reallocations from different initial allocations
+    transpositions = TranspositionTable()
+    compile_tree(maze_root("s2"), transpositions)
+    assert transpositions.hits > 0